@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+artifact_store.py
+- 다운로드용 산출물(ZIP/엑셀/CSV/.prof)을 서버 메모리 대신 로컬 디렉터리에 한 번만 써 두고 거기서 내려주는 저장소
+    파일 이름 = 내용의 sha256 (같은 내용은 세션이 몇 개든 파일 1개)
+    레시피(입력 파일 ID + 옵션)별로 만든 결과의 키를 기억 → 재실행 때는 다시 만들지 않고 키(문자열)만 넘김
+- 화면 코드는 get_artifacts() (st.cache_resource, 서버 프로세스당 하나)로 받아 씀
+- st.download_button(data=store.serve(키)) 로 넘기면 클릭했을 때만 디스크에서 읽음
+  (재실행마다 바이트를 세션별 미디어 저장소에 올리지 않으므로 열린 세션 수만큼 메모리가 늘지 않음)
+- 정리: 마지막 사용 후 ttl_s 지난 파일 삭제 → 그래도 max_bytes 넘으면 오래 안 쓴 것부터 삭제
+  (쓰기/조회 때 파일 mtime 을 갱신해 LRU 기준으로 사용, 정리는 EVICT_INTERVAL_S 에 한 번만)
+"""
+
+import os, time, hashlib, tempfile, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+import streamlit as st
+
+ARTIFACT_DIR = Path(__file__).parent / "artifacts"
+ARTIFACT_TTL_S = 6 * 3600           # 마지막 사용 후 6시간
+ARTIFACT_MAX_BYTES = 2 * 2**30      # 디렉터리 전체 2 GB
+EVICT_INTERVAL_S = 60
+MEMO_ENTRIES = 1024                 # 레시피 → 키 기억 개수 (문자열뿐이라 작음)
+
+
+def recipe_key(*parts) -> str:
+    """레시피 구성 요소(문자열/숫자/튜플) → 고정 길이 키"""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """서버 프로세스당 하나 (여러 세션 스레드에서 같이 사용)"""
+
+    def __init__(self, root: Path = ARTIFACT_DIR, ttl_s: float = ARTIFACT_TTL_S,
+                 max_bytes: int = ARTIFACT_MAX_BYTES):
+        self.root = Path(root)
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._memo: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_evict = 0.0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.evict()
+
+    def path(self, key: str) -> Path:
+        return self.root / f"{key}.bin"
+
+    def _touch(self, p: Path) -> bool:
+        try:
+            os.utime(p)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put(self, data: bytes) -> str:
+        """내용 → 키. 같은 내용이 이미 있으면 쓰지 않고 사용 시각만 갱신"""
+        key = hashlib.sha256(data).hexdigest()
+        p = self.path(key)
+        if not self._touch(p):
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, p)   # 다른 세션이 같은 내용을 동시에 써도 완성된 파일만 보임
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        self._maybe_evict()
+        return key
+
+    def memo(self, recipe: str, build: Callable[[], bytes]) -> str:
+        """레시피로 만든 적 있고 파일이 남아 있으면 그 키, 아니면 build() 결과를 저장"""
+        with self._lock:
+            key = self._memo.get(recipe)
+            if key is not None:
+                self._memo.move_to_end(recipe)
+        if key is not None and self._touch(self.path(key)):
+            return key
+        key = self.put(build())
+        with self._lock:
+            self._memo[recipe] = key
+            self._memo.move_to_end(recipe)
+            while len(self._memo) > MEMO_ENTRIES:
+                self._memo.popitem(last=False)
+        return key
+
+    def read(self, key: str) -> bytes:
+        p = self.path(key)
+        try:
+            data = p.read_bytes()
+        except FileNotFoundError:
+            raise FileNotFoundError("다운로드 파일이 정리되어 없습니다 — 화면을 새로 고친 뒤 다시 받으세요.") from None
+        self._touch(p)
+        return data
+
+    def serve(self, key: str) -> Callable[[], bytes]:
+        """st.download_button(data=...) 용 — 키만 붙잡고 있다가 클릭했을 때 디스크에서 읽음"""
+        return lambda: self.read(key)
+
+    def serve_memo(self, recipe: str, build: Callable[[], bytes]) -> Callable[[], bytes]:
+        """serve + memo 를 클릭 시점으로 미룸 — 재실행마다 새로 생기는 산출물(프로파일 등)은 누를 때 한 번만 만듦"""
+        return lambda: self.read(self.memo(recipe, build))
+
+    def _maybe_evict(self) -> None:
+        if time.time() - self._last_evict >= EVICT_INTERVAL_S:
+            self.evict()
+
+    def evict(self) -> tuple[int, int]:
+        """TTL 지난 파일 → 용량 초과분(오래 안 쓴 순) 삭제. → (삭제 개수, 남은 바이트)"""
+        self._last_evict = now = time.time()
+        files = []
+        for p in self.root.glob("*"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        removed, total = 0, sum(size for _, size, _ in files)
+        for mtime, size, p in files:
+            # .part 는 쓰는 중일 수 있으므로 TTL 로만 정리
+            expired = now - mtime > self.ttl_s
+            if expired or (total > self.max_bytes and p.suffix == ".bin"):
+                p.unlink(missing_ok=True)
+                removed += 1
+                total -= size
+        return removed, total
+
+
+@st.cache_resource
+def get_artifacts() -> ArtifactStore:
+    """서버 프로세스당 하나 — 다운로드 산출물은 디스크에 두고 세션에는 키만"""
+    return ArtifactStore()
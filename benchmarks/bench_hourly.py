@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+bench_hourly.py
+- heart_aggregate.hourly_histogram(고유값 해석 + bincount) vs 행 단위 파싱 + pivot_table 비교
+- 한 달치 합산(날짜 x BJ x 후원) 합성 데이터로 결과 동일성 확인 후 시간 출력
+- 실행 예:
+    python benchmarks/bench_hourly.py --days 31 --rows-per-day 100000
+"""
+
+import sys, time, argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from heart_aggregate import hourly_histogram, normalize_bj  # noqa: E402
+
+
+def make_merged(days: int, rows_per_day: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = days * rows_per_day
+    sec = rng.integers(0, 86400, n)
+    return pd.DataFrame({
+        "날짜": np.repeat([f"2025-10-{d + 1:02d}" for d in range(days)], rows_per_day),
+        "후원시간": [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in sec],
+        "참여BJ": [f"[팀{b % 3}]BJ{b}" for b in rng.integers(0, 40, n)],
+        "후원하트": rng.integers(1, 5000, n),
+    })
+
+
+def legacy(merged: pd.DataFrame, bin_minutes: int) -> pd.DataFrame:
+    """행마다 datetime 파싱 → 구간 컬럼 → pivot_table"""
+    t = merged["후원시간"].map(lambda x: pd.to_datetime(x, format="%H:%M:%S"))
+    b = (t.dt.hour * 60 + t.dt.minute) // bin_minutes
+    df = pd.DataFrame({"참여BJ": merged["참여BJ"].map(normalize_bj), "날짜": merged["날짜"],
+                       "bin": b, "h": merged["후원하트"]})
+    return df.pivot_table(index=["참여BJ", "날짜"], columns="bin", values="h", aggfunc="sum", fill_value=0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=31)
+    ap.add_argument("--rows-per-day", type=int, default=100_000)
+    ap.add_argument("--bin", type=int, default=60)
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+
+    merged = make_merged(args.days, args.rows_per_day)
+    print(f"[입력] {len(merged):,}행")
+
+    t0 = time.perf_counter()
+    new, bad = hourly_histogram(merged, args.bin)
+    t_new = time.perf_counter() - t0
+    print(f"vectorized: {t_new:.2f}s  ({len(new):,} 그룹, 해석 불가 {bad})")
+
+    if not args.skip_legacy:
+        t0 = time.perf_counter()
+        old = legacy(merged, args.bin)
+        t_old = time.perf_counter() - t0
+        grid = new.set_index(["참여BJ", "날짜"]).iloc[:, :-1]
+        assert np.array_equal(grid.to_numpy(), old.reindex(columns=range(1440 // args.bin), fill_value=0).to_numpy())
+        print(f"legacy    : {t_old:.2f}s  (x{t_old / t_new:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+bench_overlaps.py
+- heart_aggregate.detect_overlaps(행 지문 + factorize 1회) vs concat 후 DataFrame.duplicated(원본 컬럼) 비교
+- 하루 1파일짜리 한 달치에 같은 파일 재업로드 / 시간이 겹치는 파일을 섞어 시간·최대 메모리·판정 결과 확인
+- 실행 예:
+    python benchmarks/bench_overlaps.py --files 30 --rows 100000
+"""
+
+import sys, time, argparse, tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from heart_aggregate import detect_overlaps, normalize_bj, FINGERPRINT_COLS  # noqa: E402
+
+
+def make_file(day: int, rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(day)
+    sec = np.sort(rng.integers(0, 86400, rows))
+    return pd.DataFrame({
+        "날짜": f"2025-10-{day % 31 + 1:02d}",
+        "후원시간": [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in sec],
+        "참여BJ": [f"BJ{b}" for b in rng.integers(0, 40, rows)],
+        "ID": [f"user{i}" for i in rng.integers(0, 200_000, rows)],
+        "후원하트": rng.integers(1, 5000, rows),
+    })
+
+
+def legacy_normalized(frames: list) -> pd.Series:
+    """concat 후 행 단위 정규화(BJ 접두어/하트 쉼표) → duplicated"""
+    df = pd.concat(frames, ignore_index=True)[FINGERPRINT_COLS]
+    df["참여BJ"] = df["참여BJ"].apply(normalize_bj)
+    df["후원하트"] = pd.to_numeric(df["후원하트"].astype(str).str.replace(",", "", regex=False), errors="coerce")
+    return df.duplicated()
+
+
+def measure(fn):
+    """시간은 tracemalloc 없이 따로 (추적 오버헤드가 시간을 왜곡)"""
+    t0 = time.perf_counter()
+    out = fn()
+    ms = (time.perf_counter() - t0) * 1000
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return ms, peak, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=30)
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+
+    frames = [make_file(d, args.rows) for d in range(args.files)]
+    frames.append(frames[3].copy())                                   # 같은 파일 재업로드
+    frames.append(frames[5].iloc[args.rows // 2:].reset_index(drop=True))   # 뒤 절반이 겹치는 파일
+    names = [f"day{d}.csv" for d in range(args.files)] + ["day3_copy.csv", "day5_tail.csv"]
+    print(f"[입력] {len(frames)}파일, {sum(map(len, frames)):,}행")
+
+    ms_new, mb_new, (keeps, report) = measure(lambda: detect_overlaps(names, frames, drop=True))
+    ms_raw, mb_raw, _ = measure(lambda: pd.concat(frames, ignore_index=True)[FINGERPRINT_COLS].duplicated())
+    ms_old, mb_old, dup = measure(lambda: legacy_normalized(frames))
+
+    kept = sum(int(k.sum()) for k in keeps)
+    assert kept == int((~dup).sum()) + int(report["파일 내 중복"].sum())
+    print(report[report["상태"] != "정상"].to_string(index=False))
+    print(f"{'지문+factorize':<28}{ms_new:8.0f} ms, peak {mb_new:7.1f} MB")
+    print(f"{'concat+정규화+duplicated':<28}{ms_old:8.0f} ms, peak {mb_old:7.1f} MB")
+    print(f"{'(참고) concat+duplicated 원본값':<28}{ms_raw:8.0f} ms, peak {mb_raw:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
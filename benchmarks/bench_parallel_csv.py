@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+bench_parallel_csv.py
+- parallel_csv.aggregate_csv_parallel(바이트 구간 map-reduce) vs 직렬 경로(전체 디코드 → read_csv → normalize_donations → sum_by_donor)
+- 합성 이벤트 CSV(utf-8, 하트 천 단위 쉼표 섞음) 한 개로 워커 수별 시간 측정 + 결과 동일성 확인,
+  작은 cp949 파일로 인코딩 재시도 경로, 숫자 ID만 있는 구간(+빈칸)의 타입 추론 차이도 확인
+- 실행 예:
+    python benchmarks/bench_parallel_csv.py --rows 3000000 --workers 1 2 4 8
+"""
+
+import io, os, csv, sys, time, argparse, tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from donations import normalize_donations, sum_by_donor  # noqa: E402
+from parallel_csv import aggregate_csv_parallel, usable_workers  # noqa: E402
+
+
+def make_csv(path: str, rows: int, enc: str = "utf-8", seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    ids = rng.zipf(1.3, rows) % 200_000
+    hearts = rng.integers(1, 5000, rows)
+    sec = rng.integers(0, 86400, rows)
+    pd.DataFrame({
+        "후원시간": [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in sec],
+        "참여BJ": [f"[팀{b % 3}]BJ{b}" for b in rng.integers(0, 40, rows)],
+        "후원 아이디(닉네임)": [f"user{i}{'＠p' if i % 11 == 0 else ''}(닉{i % 5000})" for i in ids],
+        "후원하트": [f"{h:,}" if h % 4 == 0 else str(h) for h in hearts],
+    }).to_csv(path, index=False, encoding=enc)
+
+
+def serial(path: str) -> pd.DataFrame:
+    """heart_aggregate.read_any_table(CSV) + 단일 파일 preprocess 와 같은 순서"""
+    raw = Path(path).read_bytes()
+    for enc in ["utf-8", "utf-8-sig", "cp949", "euc-kr"]:
+        try:
+            text = raw.decode(enc)
+        except UnicodeDecodeError:
+            continue
+        try:
+            sep = csv.Sniffer().sniff(text[:4000], delimiters=[",", "\t", ";", "|"]).delimiter
+        except Exception:
+            sep = ","
+        return sum_by_donor(normalize_donations(pd.read_csv(io.StringIO(text), sep=sep, dtype=str), ""))
+    raise ValueError("인코딩 해석 실패")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=3_000_000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        small = os.path.join(d, "small_cp949.csv")
+        make_csv(small, 20_000, enc="cp949", seed=1)
+        assert aggregate_csv_parallel(small, 2).equals(serial(small))
+        print("[cp949] 병렬 결과 = 직렬 결과")
+
+        # 숫자 ID만 있는 구간 + 빈칸: 구간별 타입 추론이면 '10140.0' 이 되어 직렬 결과와 키가 달라짐
+        numeric = os.path.join(d, "numeric_ids.csv")
+        ids = [f"user{i}(닉{i})" for i in range(200)] + [str(10_000 + i) for i in range(200)]
+        ids[300] = ""
+        pd.DataFrame({"참여BJ": "BJ1", "후원 아이디(닉네임)": ids, "후원하트": 10}).to_csv(numeric, index=False)
+        assert aggregate_csv_parallel(numeric, 2).equals(serial(numeric))
+        print("[숫자 ID 구간] 병렬 결과 = 직렬 결과")
+
+        big = os.path.join(d, "big.csv")
+        make_csv(big, args.rows)
+        print(f"[입력] {args.rows:,}행, {os.path.getsize(big) / 2**20:.0f} MB, CPU {os.cpu_count()}개")
+
+        t0 = time.perf_counter()
+        ref = serial(big)
+        t_ser = time.perf_counter() - t0
+        print(f"{'직렬':<10}{t_ser:8.2f}s  ({len(ref):,} 그룹)")
+        for w in sorted({usable_workers(w) for w in args.workers}):   # CPU 수 넘는 요청은 CPU 수로 잘림
+            t0 = time.perf_counter()
+            out = aggregate_csv_parallel(big, w)
+            t = time.perf_counter() - t0
+            assert out.equals(ref), f"workers={w}: 직렬 결과와 다름"
+            print(f"{f'병렬 x{w}':<10}{t:8.2f}s  (x{t_ser / t:.2f}, 프로세스 기동 포함)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+bench_prepare_from_csv.py
+- dm_ui.prepare_from_csv (벡터화) vs 기존 행 단위(.apply/.map) 구현 속도 비교 + 결과 동일성 확인
+- 합성 데이터 외에 경계값 표(괄호 뒤 꼬리, ID 없는 '(닉)', ＠/[팀]/중첩 괄호, 빈칸, 첫 행 닉네임 NaN)도
+  혼합/비혼합 모드, 한 번에/청크(prepare_from_files) 로 비교
+- 실행 예:
+    python benchmarks/bench_prepare_from_csv.py --rows 1000000
+"""
+
+import io, sys, time, argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dm_ui import (prepare_from_csv, prepare_from_files, aggregate_by_id, split_heart_tiers,  # noqa: E402
+                   normalize_id_from_mix, normalize_nick_from_mix)
+
+
+def legacy_prepare_from_csv(df, id_col, nick_col, heart_col, mixed: bool = True):
+    """변경 전 구현 — 비교 기준 (mixed: 혼합 감지 결과 대신 고정)"""
+    tmp = df.copy()
+    tmp.columns = [str(c).strip() for c in tmp.columns]
+
+    def _to_int(x):
+        s = str(x).strip().replace(",", "")
+        try:
+            return int(float(s))
+        except:
+            return 0
+
+    series_id = tmp[id_col]
+    if mixed:
+        tmp["후원아이디"] = series_id.map(normalize_id_from_mix)
+        tmp["닉네임_from_mix"] = series_id.map(normalize_nick_from_mix)
+    else:
+        tmp["후원아이디"] = series_id.astype(str).str.strip()
+        tmp["닉네임_from_mix"] = ""
+    tmp["닉네임_src"] = tmp[nick_col].astype(str).str.strip() if nick_col else ""
+    tmp["닉네임"] = tmp["닉네임_from_mix"]
+    mask_empty = tmp["닉네임"].isna() | (tmp["닉네임"].astype(str).str.len() == 0)
+    tmp.loc[mask_empty, "닉네임"] = tmp.loc[mask_empty, "닉네임_src"]
+    tmp["후원하트"] = tmp[heart_col].apply(_to_int)
+
+    agg = (
+        tmp.groupby(["후원아이디"], as_index=False)
+           .agg(닉네임=("닉네임", "first"), 후원하트=("후원하트", "sum"))
+    )
+    auto_df = agg[(agg["후원하트"] >= 1000) & (agg["후원하트"] < 10000)].copy()
+    vip_df  = agg[agg["후원하트"] >= 10000].copy()
+    auto_df = auto_df.sort_values(["후원하트", "후원아이디"], ascending=[False, True]).reset_index(drop=True)
+    vip_df  = vip_df.sort_values(["후원하트", "후원아이디"],  ascending=[False, True]).reset_index(drop=True)
+    return auto_df, vip_df
+
+
+def make_export(rows: int, ids: int, seed: int = 0) -> pd.DataFrame:
+    """관리자 내보내기와 비슷한 모양의 가짜 데이터"""
+    rng = np.random.default_rng(seed)
+    uid = rng.integers(0, ids, size=rows)
+    mix = pd.Series([f"user{u}(닉{u % 977})" for u in uid])
+    mix[uid % 50 == 0] = [f"user{u}" for u in uid[uid % 50 == 0]]           # 닉네임 없는 행
+    hearts = rng.integers(1, 3000, size=rows).astype(str)
+    hearts = pd.Series(hearts)
+    hearts[uid % 7 == 0] = [f"{int(h):,}" for h in hearts[uid % 7 == 0]]     # '1,234' 형식
+    hearts[uid % 997 == 0] = "-"                                            # 해석 불가
+    return pd.DataFrame({"후원 아이디(닉네임)": mix, "닉네임": "", "후원하트": hearts})
+
+
+def edge_cases() -> pd.DataFrame:
+    """깨끗한 합성 데이터로는 안 드러나는 값들 (하트는 대부분 자동발송 구간 이상)
+    - 'plain' / 'abc(닉)x' 첫 행은 닉네임 칸이 비어 있음(NaN) → 다음 행의 닉네임을 써야 함"""
+    ids = ["plain", "abc(닉)x", "abc(다른닉)", "(닉만)", "a＠b([팀]닉(중첩))", "  sp (n) ", np.nan, "plain",
+           "x(a)(b)", "", "10140", "10140.0", "user7(닉7)", "abc"]
+    nicks = [np.nan, np.nan, "별도", "n1", "", np.nan, "n2", "진짜닉", "", "n3", np.nan, "", "", "abc닉"]
+    hearts = ["1,500"] * 12 + ["12000", "999"]
+    return pd.DataFrame({"후원 아이디(닉네임)": ids, "닉네임": nicks, "후원하트": hearts})
+
+
+class _Upload(io.BytesIO):
+    name = "edge.csv"
+
+
+def check_edges() -> None:
+    df = edge_cases()
+    cols = ("후원 아이디(닉네임)", "닉네임", "후원하트")
+    csv_bytes = df.to_csv(index=False).encode("utf-8")
+    df_csv = pd.read_csv(io.BytesIO(csv_bytes), dtype=str)   # 업로드 경로와 같은 입력 (빈 문자열 → NaN)
+    for mixed in (True, False):
+        # 괄호 비율이 높아 자동 감지하면 혼합이 되므로 모드는 고정해서 호출
+        cases = {
+            "표": (tuple(split_heart_tiers(aggregate_by_id(df, *cols, mixed=mixed))),
+                   legacy_prepare_from_csv(df, *cols, mixed=mixed)),
+            # 청크 3행씩 → fold_aggregates 로 접기 (청크 경계에서 닉네임 null 처리 확인)
+            "CSV 청크": (prepare_from_files([_Upload(csv_bytes)], *cols, chunksize=3, mixed=mixed),
+                         legacy_prepare_from_csv(df_csv, *cols, mixed=mixed)),
+        }
+        for new, old in cases.values():
+            for a, b in zip(new, old):
+                pd.testing.assert_frame_equal(a, b)
+    print("[edge] 경계값 표 결과 동일 (혼합/비혼합, 한 번에/청크)")
+
+
+def timed(fn, *a, **kw):
+    t0 = time.perf_counter()
+    out = fn(*a, **kw)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--ids", type=int, default=300_000)
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+
+    check_edges()
+    df = make_export(args.rows, args.ids)
+    print(f"[data] rows={len(df):,} ids≈{args.ids:,}")
+
+    (auto_new, vip_new), t_new = timed(
+        prepare_from_csv, df, "후원 아이디(닉네임)", "닉네임", "후원하트", force_mixed=True)
+    print(f"[vectorized] {t_new:.2f}s  auto={len(auto_new):,} vip={len(vip_new):,}")
+
+    if not args.skip_legacy:
+        (auto_old, vip_old), t_old = timed(
+            legacy_prepare_from_csv, df, "후원 아이디(닉네임)", "닉네임", "후원하트")
+        print(f"[legacy]     {t_old:.2f}s  auto={len(auto_old):,} vip={len(vip_old):,}")
+        pd.testing.assert_frame_equal(auto_new, auto_old)
+        pd.testing.assert_frame_equal(vip_new, vip_old)
+        print(f"[check] 결과 동일 — {t_old / max(t_new, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
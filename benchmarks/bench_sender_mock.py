@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+bench_sender_mock.py
+- panda_mock_server(로컬 모사) 상대로 panda_dm_sender를 실제 실행해
+  단계별 지연(p50/p95)과 성공/실패 오판율을 보고
+- 크롬 + chromedriver 필요 (--driver-path / --offline 은 그대로 sender에 전달)
+- 실행 예:
+    python benchmarks/bench_sender_mock.py --count 40 --headless
+"""
+
+import os, sys, json, argparse, tempfile, threading, subprocess
+from pathlib import Path
+from urllib.request import urlopen
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from panda_mock_server import make_server  # noqa: E402
+
+
+def make_recipients(n: int) -> list:
+    """일반/실패/차단/지연/무응답 수신자를 섞은 목록"""
+    kinds = ["user"] * 6 + ["fail", "block", "slow", "silent"]
+    return [f"{kinds[i % len(kinds)]}{i:04d}" for i in range(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--count", type=int, default=40)
+    ap.add_argument("--headless", action="store_true")
+    ap.add_argument("--notice", action="store_true")
+    ap.add_argument("--close-after-send", action="store_true")
+    ap.add_argument("--slow-ms", type=int, default=1500)
+    ap.add_argument("--driver-path", type=str, default="")
+    ap.add_argument("--offline", action="store_true")
+    args = ap.parse_args()
+
+    srv = make_server("127.0.0.1", 0, notice=args.notice, close_after_send=args.close_after_send,
+                      slow_ms=args.slow_ms)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{srv.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        ids = make_recipients(args.count)
+        pd.DataFrame({"후원아이디": ids, "후원하트": 1000}).to_csv(tmp / "r.csv", index=False)
+        (tmp / "m.txt").write_text("안녕하세요\n후원 감사합니다", encoding="utf-8")
+
+        cmd = [sys.executable, str(ROOT / "panda_dm_sender.py"), "--base-url", base_url,
+               "--recipients", str(tmp / "r.csv"), "--message-file", str(tmp / "m.txt"),
+               "--status-file", str(tmp / "status.json"), "--trace-file", str(tmp / "trace.jsonl"), "--reset"]
+        if args.headless:
+            cmd.append("--headless")
+        if args.driver_path:
+            cmd += ["--driver-path", args.driver_path]
+        if args.offline:
+            cmd.append("--offline")
+        env = dict(os.environ, PANDA_ID="mock", PANDA_PW="mock")
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        print(proc.stdout.strip())
+        if proc.returncode != 0:
+            print(proc.stderr.strip()); sys.exit(proc.returncode)
+
+        status = json.loads((tmp / "status.json").read_text(encoding="utf-8"))
+        trace = pd.read_json(tmp / "trace.jsonl", lines=True)
+
+    truth = {r["id"]: r["delivered"] for r in json.loads(urlopen(base_url + "/api/log").read())}
+    srv.shutdown()
+
+    res = pd.DataFrame(status["items"])[["id", "status"]]
+    res["delivered"] = res["id"].map(truth).fillna(False).astype(bool)
+    res["kind"] = res["id"].str.replace(r"\d+$", "", regex=True)
+    res["wrong"] = (res["status"] == "success") != res["delivered"]
+
+    print("\n[단계별 지연 ms]")
+    print(trace.groupby("step")["ms"].describe(percentiles=[0.5, 0.95])[["count", "50%", "95%", "max"]]
+               .round(1).to_string())
+    print("\n[수신자 종류별 오판]")
+    print(res.groupby("kind").agg(건수=("id", "size"), 오판=("wrong", "sum")).to_string())
+    print(f"\n오판율: {res['wrong'].mean():.1%} ({int(res['wrong'].sum())}/{len(res)})")
+
+
+if __name__ == "__main__":
+    main()
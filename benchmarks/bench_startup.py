@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+bench_startup.py
+- 콜드 스타트(import 시간/최대 RSS) 측정 + 기준값(baseline) 대비 비교
+- 항목마다 새 파이썬 프로세스를 띄워 `-X importtime` 출력과 ru_maxrss를 수집
+    import:<모듈>   모듈 import만
+    sender:preflight  panda_dm_sender.main()이 대상 파일 검사 후 종료할 때까지
+- 실행 예:
+    python benchmarks/bench_startup.py --save-baseline      # 현재 값을 기준값으로 저장
+    python benchmarks/bench_startup.py --top 15              # 기준값 대비 비교 + 느린 import 상위 15개
+"""
+
+import sys, json, argparse, statistics, subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).with_name("startup_baseline.json")
+# 인터프리터 기동/측정 코드 자체가 불러오는 모듈은 순위에서 제외
+IGNORE = {"site", "encodings", "_frozen_importlib_external", "zipimport", "codecs", "io", "abc",
+          "json", "resource", "runpy", "time"}
+
+# 자식 프로세스에서 실행: 대상 코드를 돌린 뒤 경과시간/RSS를 마지막 줄 JSON으로 출력
+PROBE = r"""
+import sys, time, json, resource, runpy
+t0 = time.perf_counter()
+kind, target = sys.argv[1], sys.argv[2]
+sys.path.insert(0, {root!r})
+try:
+    if kind == "import":
+        __import__(target)
+    else:
+        sys.argv = [target] + sys.argv[3:]
+        runpy.run_path(target, run_name="__main__")
+except SystemExit:
+    pass
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"ms": (time.perf_counter() - t0) * 1000, "rss_kb": rss}}))
+"""
+
+CASES = {
+    "import:main deps(streamlit)": ("import", "streamlit", []),
+    "import:heart_aggregate": ("import", "heart_aggregate", []),
+    "import:dm_ui": ("import", "dm_ui", []),
+    "import:panda_dm_sender": ("import", "panda_dm_sender", []),
+    "sender:preflight": ("run", str(ROOT / "panda_dm_sender.py"),
+                         ["--recipients", str(ROOT / "__missing__.csv")]),
+}
+
+
+def run_case(kind: str, target: str, extra: list) -> tuple[dict, list]:
+    """한 번 실행 → ({ms, rss_kb}, importtime 목록[(누적us, 모듈)])"""
+    code = PROBE.format(root=str(ROOT))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code, kind, target, *extra],
+                          capture_output=True, text=True, cwd=str(ROOT))
+    out = [ln for ln in proc.stdout.strip().splitlines() if ln.startswith("{")]
+    if not out:
+        raise RuntimeError(f"{target}: 측정 실패\n{proc.stderr[-2000:]}")
+    imports = []
+    for ln in proc.stderr.splitlines():
+        if not ln.startswith("import time:") or "cumulative" in ln:
+            continue
+        _self_us, cum_us, name = ln[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2   # 들여쓰기 = 다른 모듈이 끌어온 하위 import
+        name = name.strip()
+        if depth > 1 or name in IGNORE or name == target:
+            continue
+        imports.append((int(cum_us), name))
+    return json.loads(out[-1]), imports
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--save-baseline", action="store_true")
+    args = ap.parse_args()
+
+    results = {}
+    for label, (kind, target, extra) in CASES.items():
+        runs, imports = [], []
+        for _ in range(args.repeat):
+            r, imports = run_case(kind, target, extra)
+            runs.append(r)
+        results[label] = {
+            "ms": round(statistics.median(r["ms"] for r in runs), 1),
+            "rss_mb": round(max(r["rss_kb"] for r in runs) / 1024, 1),
+        }
+        top_level = sorted(imports, reverse=True)[:args.top]
+        results[label]["top_imports"] = [[n, round(us / 1000, 1)] for us, n in top_level]
+
+    base = json.loads(BASELINE.read_text(encoding="utf-8")) if BASELINE.exists() else {}
+    print(f"{'항목':<30}{'ms':>10}{'Δms':>10}{'RSS MB':>10}{'ΔMB':>8}")
+    for label, r in results.items():
+        b = base.get(label, {})
+        dms = f"{r['ms'] - b['ms']:+.1f}" if "ms" in b else "-"
+        dmb = f"{r['rss_mb'] - b['rss_mb']:+.1f}" if "rss_mb" in b else "-"
+        print(f"{label:<30}{r['ms']:>10.1f}{dms:>10}{r['rss_mb']:>10.1f}{dmb:>8}")
+        print("    느린 import: " + ", ".join(f"{n} {ms}ms" for n, ms in r["top_imports"]))
+
+    if args.save_baseline:
+        BASELINE.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[baseline] 저장: {BASELINE.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+bench_topk.py
+- donor_index.DonorIndex 증분 추가/TOP-K 조회 vs 매번 groupby + sort_values 전체 정렬 비교
+- 날짜별 합성 파일을 하루씩 추가하면서 (1) 하루 추가 비용 (2) 날짜 범위/BJ 묶음 TOP-K 조회 시간 측정,
+  결과(ID별 합계 상위 K)가 전체 정렬 방식과 같은지 확인
+- ID/닉네임 앞부분 검색: 역색인(bisect) vs 합친 표에서 str.startswith 필터
+- 실행 예:
+    python benchmarks/bench_topk.py --days 31 --rows-per-day 100000 --k 50
+"""
+
+import sys, time, argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from donor_index import DonorIndex  # noqa: E402
+
+
+def make_day(day: int, rows: int, n_ids: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + day)
+    ids = rng.zipf(1.3, rows) % n_ids   # 소수의 큰손 + 다수의 소액 후원자
+    return pd.DataFrame({
+        "날짜": f"2025-10-{day + 1:02d}",
+        "참여BJ": [f"BJ{b}" for b in rng.integers(0, 40, rows)],
+        "ID": [f"user{i}" for i in ids],
+        "닉네임": [f"닉{i}" for i in ids],
+        "후원하트": rng.integers(1, 5000, rows),
+    })
+
+
+def legacy_top(df: pd.DataFrame, k: int, bjs, d_from, d_to) -> pd.DataFrame:
+    sub = df[(df["날짜"] >= d_from) & (df["날짜"] <= d_to) & df["참여BJ"].isin(bjs)]
+    return sub.groupby("ID", as_index=False)["후원하트"].sum().sort_values("후원하트", ascending=False).head(k)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=31)
+    ap.add_argument("--rows-per-day", type=int, default=100_000)
+    ap.add_argument("--ids", type=int, default=200_000)
+    ap.add_argument("--k", type=int, default=50)
+    args = ap.parse_args()
+
+    idx, frames, add_ms = DonorIndex(), [], []
+    for day in range(args.days):
+        df = make_day(day, args.rows_per_day, args.ids)
+        frames.append(df)
+        t0 = time.perf_counter()
+        idx.add(f"day{day}", df)
+        add_ms.append((time.perf_counter() - t0) * 1000)
+    print(f"[증분 추가] 하루 {args.rows_per_day:,}행: 평균 {np.mean(add_ms):.0f} ms, 마지막 날 {add_ms[-1]:.0f} ms")
+
+    all_df = pd.concat(frames, ignore_index=True)
+    dates = idx.dates()
+    bjs = [f"BJ{b}" for b in range(0, 40, 3)]
+    d_from, d_to = dates[len(dates) // 4], dates[-1]
+
+    t0 = time.perf_counter()
+    new = idx.top_k(args.k, bjs=bjs, date_from=d_from, date_to=d_to)
+    t_new = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    old = legacy_top(all_df, args.k, bjs, d_from, d_to)
+    t_old = time.perf_counter() - t0
+    assert new["후원하트"].tolist() == old["후원하트"].tolist()
+    print(f"[TOP-{args.k}] {d_from}~{d_to}, BJ {len(bjs)}명: 인덱스 {t_new * 1000:.0f} ms, "
+          f"groupby+sort {t_old * 1000:.0f} ms (x{t_old / t_new:.1f})")
+
+    t0 = time.perf_counter()
+    per = idx.top_k(args.k, date_from=d_from, date_to=d_to, per_bj=True)
+    print(f"[BJ별 TOP-{args.k}] {per['참여BJ'].nunique()}명: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    t0 = time.perf_counter()
+    idx.search("user1")
+    print(f"[검색] 역색인 생성(첫 검색) {(time.perf_counter() - t0) * 1000:.0f} ms")
+    for q in ("user12", "닉777"):
+        t0 = time.perf_counter()
+        hits = idx.search(q)
+        t_new = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        col = "ID" if q.startswith("user") else "닉네임"
+        ref = all_df[all_df[col].str.startswith(q)].groupby("ID")["후원하트"].sum()
+        t_old = time.perf_counter() - t0
+        assert hits.set_index("ID")["총하트"].to_dict() == ref[hits["ID"]].to_dict()
+        print(f"[검색 '{q}'] 역색인 {t_new * 1000:.1f} ms, str.startswith {t_old * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+bench_xlsx_reader.py
+- heart_aggregate.read_xlsx_streaming(read_only 스트리밍) vs pd.read_excel 속도/최대 메모리 비교
+- 여러 시트(날짜별)짜리 후원 내역 엑셀을 만들어
+    단일 시트:  read_excel(sheet_name=0)            vs  read_xlsx_streaming(0)
+    모든 시트:  read_excel(sheet_name=None)+concat  vs  read_xlsx_streaming(ALL_SHEETS)
+  결과 값이 같은지 확인 후 시간(중앙값)과 tracemalloc 최대 메모리를 출력
+- 실행 예:
+    python benchmarks/bench_xlsx_reader.py --rows 50000 --sheets 7
+"""
+
+import sys, time, argparse, tempfile, statistics, tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from heart_aggregate import read_xlsx_streaming, ALL_SHEETS, SHEET_COL  # noqa: E402
+
+
+def make_workbook(path: Path, rows: int, sheets: int, seed: int = 0) -> None:
+    """시트명 = 날짜, 시트마다 rows행 (write_only 로 빠르게 생성)"""
+    from openpyxl import Workbook
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+    for s in range(sheets):
+        ws = wb.create_sheet(f"2025-10-{s + 1:02d}")
+        ws.append(["후원시간", "참여BJ", "후원 아이디(닉네임)", "후원하트"])
+        ids = rng.integers(0, rows // 4 + 1, rows)
+        bjs = rng.integers(0, 30, rows)
+        hearts = rng.integers(1, 5000, rows)
+        for i in range(rows):
+            ws.append([f"{i % 24:02d}:{i % 60:02d}:00", f"[팀]BJ{bjs[i]}",
+                       f"user{ids[i]}{'@aff' if ids[i] % 7 == 0 else ''}(닉{ids[i]})", int(hearts[i])])
+    wb.save(path)
+
+
+def measure(fn, repeat: int) -> tuple[float, float, pd.DataFrame]:
+    """(중앙값 ms, 최대 메모리 MB, 결과)"""
+    times, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = fn(); times.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak / 2**20, out
+
+
+def legacy_all(path: Path) -> pd.DataFrame:
+    parts = pd.read_excel(path, sheet_name=None)
+    return pd.concat([df.assign(**{SHEET_COL: name}) for name, df in parts.items()], ignore_index=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50_000, help="시트당 행 수")
+    ap.add_argument("--sheets", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "hearts.xlsx"
+        make_workbook(path, args.rows, args.sheets)
+        print(f"[입력] {args.sheets}시트 x {args.rows:,}행, {path.stat().st_size / 2**20:.1f} MB")
+
+        cases = {
+            "단일 시트": (lambda: pd.read_excel(path, sheet_name=0), lambda: read_xlsx_streaming(path, 0)),
+            "모든 시트": (lambda: legacy_all(path), lambda: read_xlsx_streaming(path, ALL_SHEETS)),
+        }
+        print(f"{'항목':<10}{'방식':<12}{'ms':>10}{'peak MB':>10}")
+        for label, (old_fn, new_fn) in cases.items():
+            t_old, m_old, r_old = measure(old_fn, args.repeat)
+            t_new, m_new, r_new = measure(new_fn, args.repeat)
+            pd.testing.assert_frame_equal(r_old, r_new, check_dtype=False)
+            print(f"{label:<10}{'read_excel':<12}{t_old:>10.0f}{m_old:>10.1f}")
+            print(f"{'':<10}{'streaming':<12}{t_new:>10.0f}{m_new:>10.1f}"
+                  f"   (x{t_old / t_new:.2f} 빠름, 메모리 {m_new / m_old:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+delivery_index.py
+- 쪽지 발송 결과 인덱스 (SQLite, (캠페인ID, 정규화 후원아이디) 키)
+- 행 순서와 무관하게 "이 ID에게 이 캠페인 쪽지를 이미 보냈는가"를 O(1)로 조회
+  → CSV를 다시 만들거나 순서를 바꿔도 이미 성공한 ID는 자동으로 건너뜀
+- panda_dm_sender(기록)와 dm_ui(대시보드 집계)가 같은 파일을 공유
+"""
+
+import sqlite3, hashlib
+from pathlib import Path
+from datetime import datetime
+
+INDEX_DB = Path(__file__).with_name("send_index.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    campaign TEXT NOT NULL,
+    rid      TEXT NOT NULL,
+    status   TEXT NOT NULL,
+    hearts   INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated  TEXT NOT NULL,
+    PRIMARY KEY (campaign, rid)
+)
+"""
+
+
+def now_ts() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def normalize_rid(x) -> str:
+    """후원아이디 정규화: 앞뒤 공백 제거, 전각 '＠' → '@'"""
+    return str(x).strip().replace("＠", "@")
+
+
+def campaign_for_message(message: str) -> str:
+    """캠페인ID 기본값: 기본 메시지 본문 해시 (같은 메시지 = 같은 캠페인)"""
+    return "msg-" + hashlib.sha1(message.strip().encode("utf-8")).hexdigest()[:12]
+
+
+class DeliveryIndex:
+    """
+    (campaign, rid) → status 인덱스. 시작 시 캠페인 전체를 dict로 올려 조회는 메모리에서,
+    기록은 즉시 SQLite에 upsert (중간에 죽어도 성공 기록은 남음).
+    """
+
+    def __init__(self, path: Path = INDEX_DB, campaign: str = "default"):
+        self.path = Path(path)
+        self.campaign = campaign
+        self.conn = sqlite3.connect(str(self.path), timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+        self.status = dict(self.conn.execute(
+            "SELECT rid, status FROM deliveries WHERE campaign = ?", (campaign,)
+        ).fetchall())
+
+    def get(self, rid) -> str:
+        return self.status.get(normalize_rid(rid), "pending")
+
+    def is_done(self, rid) -> bool:
+        return self.get(rid) == "success"
+
+    def mark(self, rid, status: str, hearts: int = 0) -> None:
+        rid = normalize_rid(rid)
+        self.conn.execute(
+            """
+            INSERT INTO deliveries (campaign, rid, status, hearts, attempts, updated)
+            VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT (campaign, rid) DO UPDATE SET
+                status = excluded.status,
+                hearts = CASE WHEN excluded.hearts > 0 THEN excluded.hearts ELSE deliveries.hearts END,
+                attempts = deliveries.attempts + 1,
+                updated = excluded.updated
+            """,
+            (self.campaign, rid, status, int(hearts), now_ts()),
+        )
+        self.conn.commit()
+        self.status[rid] = status
+
+    def reset(self) -> None:
+        """현재 캠페인 기록 삭제"""
+        self.conn.execute("DELETE FROM deliveries WHERE campaign = ?", (self.campaign,))
+        self.conn.commit()
+        self.status.clear()
+
+    def counts(self, rids) -> dict:
+        """주어진 ID 목록 기준 {success, fail, pending} 집계"""
+        out = {"success": 0, "fail": 0, "pending": 0}
+        for rid in rids:
+            s = self.get(rid)
+            out[s if s in out else "pending"] += 1
+        return out
+
+    def close(self) -> None:
+        self.conn.close()
@@ -1,18 +1,17 @@
 # dm_ui.py
 # -*- coding: utf-8 -*-
 
-import io, os, re, json, time, sys, subprocess
+import io, re, json, time, sys
 from pathlib import Path
-from typing import Tuple, List
+from typing import Tuple, List, Sequence
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-# (선택) 자동 새로고침
-try:
-    from streamlit_autorefresh import st_autorefresh
-except Exception:
-    st_autorefresh = None
+from delivery_index import DeliveryIndex, INDEX_DB, normalize_rid, campaign_for_message
+from sender_supervisor import SenderSupervisor
+from artifact_store import get_artifacts, recipe_key
 
 
 # =========================
@@ -27,6 +26,9 @@ SENDER_PY = BASE_DIR / "panda_dm_sender.py"   # 외부 전송 스크립트
 # 경로/파일 상수 근처에 추가
 LOG_OUT = BASE_DIR / "sender_stdout.log"
 LOG_ERR = BASE_DIR / "sender_stderr.log"
+TRACE_JSONL = BASE_DIR / "send_trace.jsonl"       # 전송 단계별 소요시간(span) 로그
+CHROME_PROFILE_DIR = BASE_DIR / "chrome_profile"   # 로그인 세션 재사용용 크롬 프로필
+PROFILE_OUT = BASE_DIR / "send_profile.prof"       # 프로파일 실행 시 cProfile 결과
 
 
 # =========================
@@ -85,6 +87,35 @@ def normalize_nick_from_mix(x: str) -> str:
     m = re.search(r"\((.*?)\)", s)
     return (m.group(1).strip() if m else "")
 
+def split_mixed_ids(values) -> Tuple[pd.Series, pd.Series]:
+    """
+    '아이디(닉네임)' 값들 → (ID, 닉네임). normalize_id_from_mix / normalize_nick_from_mix 와 결과 동일 (extract 두 번)
+    - 쪽지 대상 ID는 내보내기 값 그대로 둔다: 하트 합계 탭(donations.split_donor_column)과 달리
+      괄호 뒤 꼬리('abc(닉)x' → 'abc') 허용, ＠ 치환/닉네임 정리 없음
+    """
+    raw = pd.Series(values, dtype=object)
+    s = raw.astype(str).str.strip()
+    ids = s.str.extract(r"^\s*([^()]+)", expand=False).fillna(s).str.strip()
+    nicks = s.str.extract(r"\((.*?)\)", expand=False).fillna("").str.strip()
+    na = raw.isna().to_numpy()
+    ids[na] = ""
+    nicks[na] = ""
+    return ids, nicks
+
+def to_int_hearts(series: pd.Series) -> pd.Series:
+    """'1,234' / '12.7' / 숫자형 → int64 (소수점 버림, 해석 불가는 0)"""
+    if pd.api.types.is_bool_dtype(series):
+        return pd.Series(0, index=series.index, dtype="int64")
+    if pd.api.types.is_numeric_dtype(series):
+        vals = series.astype("float64").to_numpy()
+    else:
+        # 하트 값도 종류가 많지 않으므로 고유값만 숫자로 바꾼 뒤 펼친다
+        codes, uniq = pd.factorize(series, use_na_sentinel=False)
+        txt = pd.Series(uniq, dtype=object).astype(str).str.strip().str.replace(",", "", regex=False)
+        vals = pd.to_numeric(txt, errors="coerce").to_numpy(dtype="float64")[codes]
+    vals = np.where(np.isfinite(vals), vals, 0)
+    return pd.Series(np.trunc(vals).astype("int64"), index=series.index)
+
 def detect_mixed_id(series: pd.Series, sample: int = 200, threshold: float = 0.3) -> bool:
     """값 중 '( )' 패턴이 일정 비율 이상이면 혼합 컬럼으로 간주"""
     try:
@@ -95,61 +126,200 @@ def detect_mixed_id(series: pd.Series, sample: int = 200, threshold: float = 0.3
         return False
 
 
-def prepare_from_csv(
+# =========================
+# 하트 구간(티어)
+# =========================
+# 구간 하한 목록(오름차순). 구간 k = [edges[k], edges[k+1]), 마지막 구간은 상한 없음.
+# 기본값: 자동발송 1,000 ~ 9,999 / VIP 10,000+
+HEART_TIER_EDGES: Tuple[int, ...] = (1000, 10000)
+
+def tier_label(edges: Sequence[int], k: int) -> str:
+    """구간 k의 표시용 범위 문자열 (예: '1,000 ~ 9,999', '10,000+')"""
+    lo = int(edges[k])
+    if k + 1 < len(edges):
+        return f"{lo:,} ~ {int(edges[k + 1]) - 1:,}"
+    return f"{lo:,}+"
+
+def split_heart_tiers(agg: pd.DataFrame, edges: Sequence[int] = HEART_TIER_EDGES) -> List[pd.DataFrame]:
+    """
+    ID별 합계표(후원아이디 오름차순)를 구간별로 나눈다.
+    searchsorted 한 번으로 전체 행의 구간 번호를 구하고, 후원하트 내림차순 안정 정렬도
+    한 번만 한 뒤 잘라낸다 (동점은 입력 순서=후원아이디 오름차순 유지).
+    """
+    edges = np.asarray(sorted(int(e) for e in edges), dtype="int64")
+    if len(edges) == 0:
+        raise ValueError("하트 구간(edges)이 비어 있습니다.")
+    ordered = agg.sort_values("후원하트", ascending=False, kind="stable").reset_index(drop=True)
+    codes = np.searchsorted(edges, ordered["후원하트"].to_numpy(), side="right") - 1
+    return [ordered[codes == k].reset_index(drop=True) for k in range(len(edges))]
+
+def aggregate_by_id(
     df: pd.DataFrame,
     id_col: str,
     nick_col: str,
     heart_col: str,
     force_mixed: bool = False,
-) -> tuple[pd.DataFrame, pd.DataFrame]:
+    mixed: bool | None = None,
+) -> pd.DataFrame:
     """
+    원본 표(또는 그 일부 청크) → ID별 (첫 닉네임, 하트 합) 표. 결과는 후원아이디 오름차순.
     - '아이디(닉네임)' 혼합 여부를 자동 감지(+토글)해서 분리
+      (mixed 를 주면 감지하지 않고 그대로 사용 — 청크로 나눠 부를 때 청크마다 판정이 갈리지 않게)
     - 닉네임은 혼합에서 추출값 우선, 없으면 별도 닉네임 컬럼 사용
-    - 같은 ID 합산(=당일 총합) 후 자동발송/ VIP 분리
     """
     tmp = df.copy()
     tmp.columns = [str(c).strip() for c in tmp.columns]
 
-    def _to_int(x):
-        s = str(x).strip().replace(",", "")
-        try:
-            return int(float(s))
-        except:
-            return 0
-
     series_id = tmp[id_col]
-    mixed = force_mixed or detect_mixed_id(series_id)
+    if mixed is None:
+        mixed = force_mixed or detect_mixed_id(series_id)
 
+    # 같은 후원자가 여러 줄 나오므로 문자열 처리는 고유값에만 하고 정수 코드로 펼친다
+    raw_codes, raw_uniq = pd.factorize(series_id, use_na_sentinel=False)
     if mixed:
-        tmp["후원아이디"] = series_id.map(normalize_id_from_mix)
-        tmp["닉네임_from_mix"] = series_id.map(normalize_nick_from_mix)
+        id_u, nick_u = split_mixed_ids(raw_uniq)
     else:
-        tmp["후원아이디"] = series_id.astype(str).str.strip()
-        tmp["닉네임_from_mix"] = ""
-
+        id_u = pd.Series(raw_uniq, dtype=object).astype(str).str.strip()
+        nick_u = pd.Series("", index=id_u.index)
+    # 비혼합 모드의 빈칸(NaN) ID는 코드 -1 → 합산에서 제외 (기존 groupby 와 동일)
+    id_codes, id_uniq = pd.factorize(id_u, sort=True)
+    row_id = id_codes[raw_codes]
+    keep = np.flatnonzero(row_id >= 0)
+
+    # 같은 ID 총합
+    hearts = np.zeros(len(id_uniq), dtype="int64")
+    np.add.at(hearts, row_id[keep], to_int_hearts(tmp[heart_col]).to_numpy()[keep])
+
+    # 닉네임: 행마다 혼합 추출값, 비어 있으면 별도 닉네임 컬럼 → ID별로 처음 나온 null 아닌 값
+    # (기존 groupby(...).first() 와 동일 — 첫 행의 닉네임 칸이 비어 있으면 다음 행 값을 씀)
+    row_nick = nick_u.to_numpy(dtype=object)[raw_codes[keep]]
     if nick_col:
-        tmp["닉네임_src"] = tmp[nick_col].astype(str).str.strip()
-    else:
-        tmp["닉네임_src"] = ""
+        src_codes, src_uniq = pd.factorize(tmp[nick_col], use_na_sentinel=False)
+        src = pd.Series(src_uniq, dtype=object).astype(str).str.strip().to_numpy(dtype=object)
+        has_mix = (nick_u.str.len() > 0).to_numpy()[raw_codes[keep]]
+        row_nick = np.where(has_mix, row_nick, src[src_codes[keep]])
+    nick = pd.Series(row_nick, dtype=str).groupby(row_id[keep]).first().reset_index(drop=True)
 
-    tmp["닉네임"] = tmp["닉네임_from_mix"]
-    mask_empty = tmp["닉네임"].isna() | (tmp["닉네임"].astype(str).str.len() == 0)
-    tmp.loc[mask_empty, "닉네임"] = tmp.loc[mask_empty, "닉네임_src"]
+    return pd.DataFrame({"후원아이디": pd.Series(id_uniq), "닉네임": nick, "후원하트": hearts})
 
-    tmp["후원하트"] = tmp[heart_col].apply(_to_int)
 
-    # 같은 ID 총합(=하루 합계)
-    agg = (
-        tmp.groupby(["후원아이디"], as_index=False)
-           .agg(닉네임=("닉네임", "first"), 후원하트=("후원하트", "sum"))
-    )
+def fold_aggregates(acc: pd.DataFrame, part: pd.DataFrame) -> pd.DataFrame:
+    """
+    누적 ID별 합계(acc)에 새 부분 합계(part)를 합친다.
+    닉네임은 먼저 본 null 아닌 값(acc 우선), 하트는 합산. 결과는 후원아이디 오름차순.
+    """
+    if acc is None or acc.empty:
+        return part.reset_index(drop=True)
+    both = pd.concat([acc, part], ignore_index=True)
+    codes, uniq = pd.factorize(both["후원아이디"], sort=True)
+    hearts = np.zeros(len(uniq), dtype="int64")
+    np.add.at(hearts, codes, both["후원하트"].to_numpy(dtype="int64"))
+    return pd.DataFrame({
+        "후원아이디": pd.Series(uniq),
+        "닉네임": both["닉네임"].groupby(codes).first().reset_index(drop=True),   # null 아닌 첫 값
+        "후원하트": hearts,
+    })
 
-    auto_df = agg[(agg["후원하트"] >= 1000) & (agg["후원하트"] < 10000)].copy()
-    vip_df  = agg[agg["후원하트"] >= 10000].copy()
 
-    auto_df = auto_df.sort_values(["후원하트", "후원아이디"], ascending=[False, True]).reset_index(drop=True)
-    vip_df  = vip_df.sort_values(["후원하트", "후원아이디"],  ascending=[False, True]).reset_index(drop=True)
-    return auto_df, vip_df
+def prepare_from_csv(
+    df: pd.DataFrame,
+    id_col: str,
+    nick_col: str,
+    heart_col: str,
+    force_mixed: bool = False,
+    tier_edges: Sequence[int] = HEART_TIER_EDGES,
+) -> Tuple[pd.DataFrame, ...]:
+    """
+    같은 ID 합산(=당일 총합) 후 tier_edges 구간별로 분리
+    (기본값이면 (자동발송, VIP) 두 개를 반환)
+    """
+    agg = aggregate_by_id(df, id_col, nick_col, heart_col, force_mixed=force_mixed)
+    return tuple(split_heart_tiers(agg, tier_edges))
+
+
+# =========================
+# 여러 CSV 스트리밍 합산
+# =========================
+CSV_CHUNK_ROWS = 200_000
+
+def sniff_csv_encoding(head: bytes) -> str:
+    """파일 앞부분으로 인코딩 결정 (utf-8[-sig] 우선, 아니면 cp949)"""
+    import codecs
+    try:
+        # final=False: 앞부분을 자르다 생긴 멀티바이트 경계는 오류로 보지 않음
+        codecs.getincrementaldecoder("utf-8-sig")().decode(head, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp949"
+
+def iter_csv_chunks(uploaded, chunksize: int = CSV_CHUNK_ROWS):
+    """
+    업로드 파일을 chunksize 행 단위 DataFrame으로 순차 반환 (전체를 한 번에 올리지 않음)
+    - 모든 열을 문자열로 읽음: 청크마다 하는 타입 추론이 갈리면 같은 ID가 '10140' / '10140.0' 으로 나뉨
+    """
+    uploaded.seek(0)
+    enc = sniff_csv_encoding(uploaded.read(64 * 1024))
+    uploaded.seek(0)
+    yield from pd.read_csv(uploaded, encoding=enc, chunksize=chunksize, dtype=str)
+
+def read_csv_head(uploaded, nrows: int = 500) -> pd.DataFrame:
+    """컬럼 매핑/혼합 감지용 앞부분만 읽기"""
+    df = next(iter_csv_chunks(uploaded, chunksize=nrows), pd.DataFrame())
+    uploaded.seek(0)
+    return df
+
+def prepare_from_files(
+    files,
+    id_col: str,
+    nick_col: str,
+    heart_col: str,
+    force_mixed: bool = False,
+    tier_edges: Sequence[int] = HEART_TIER_EDGES,
+    chunksize: int = CSV_CHUNK_ROWS,
+    on_skip=None,
+    mixed: bool | None = None,
+) -> Tuple[pd.DataFrame, ...]:
+    """
+    여러 CSV(며칠치)를 청크 단위로 읽어 ID별 누적 합계 하나에 접어 넣은 뒤
+    합계 기준으로 구간 분리. 원본 행 전체를 메모리에 모으지 않는다.
+    - 닉네임: 처음 본 값 (파일 순서 → 파일 내 행 순서)
+    - 혼합 여부: mixed 를 주면 그 값, 아니면 처음 읽은 청크로 한 번만 판정해 모든 청크에 같은 규칙 적용
+    - 선택한 컬럼이 없는 파일은 on_skip(파일명, 사유) 호출 후 건너뜀
+    """
+    need = [c for c in (id_col, nick_col, heart_col) if c]
+    acc = None
+    for uf in files:
+        for chunk in iter_csv_chunks(uf, chunksize=chunksize):
+            chunk.columns = [str(c).strip() for c in chunk.columns]
+            missing = [c for c in need if c not in chunk.columns]
+            if missing:
+                if on_skip:
+                    on_skip(getattr(uf, "name", str(uf)), f"컬럼 없음: {', '.join(missing)}")
+                break
+            if mixed is None:
+                mixed = force_mixed or detect_mixed_id(chunk[id_col])
+            part = aggregate_by_id(chunk, id_col, nick_col, heart_col, mixed=mixed)
+            acc = fold_aggregates(acc, part)
+    if acc is None:
+        acc = pd.DataFrame({"후원아이디": pd.Series(dtype=object), "닉네임": pd.Series(dtype=object),
+                            "후원하트": pd.Series(dtype="int64")})
+    return tuple(split_heart_tiers(acc, tier_edges))
+
+
+# =========================
+# 하트 합계 탭 → 쪽지 탭 인계
+# =========================
+HANDOFF_KEY = "dm-handoff"   # st.session_state 키
+
+def hand_off_donations(table: pd.DataFrame, source: str) -> int:
+    """
+    하트 합계 탭의 정규화 후원 표(ID/닉네임/후원하트 — 이미 분리·정규화됨)를 ID별 합계로 접어 세션에 보관.
+    쪽지 탭은 이 합계를 구간만 나눠 쓰므로 같은 파일을 다시 올리거나 파싱하지 않는다. → 후원자 수
+    """
+    rows = table.loc[table["ID"].str.len() > 0, ["ID", "닉네임", "후원하트"]]
+    agg = aggregate_by_id(rows, "ID", "닉네임", "후원하트")
+    st.session_state[HANDOFF_KEY] = {"source": source, "rows": len(rows), "agg": agg, "at": now_ts()}
+    return len(agg)
 
 
 # =========================
@@ -196,9 +366,36 @@ def save_local_bundle(out_df: pd.DataFrame, base_message: str, panda_id: str, pa
 # =========================
 # 전송 실행(실시간 로그/대시보드)
 # =========================
-def run_sender_realtime(headless: bool, start: int, limit: int, reset_status: bool):
-    """전송 프로세스를 백그라운드로 시작만 하고, 화면은 1초마다 자동 새로고침되며
-    로그 파일과 send_status.json을 읽어 렌더링한다."""
+@st.cache_resource
+def get_supervisor() -> SenderSupervisor:
+    """서버 프로세스당 하나 — 모든 브라우저 세션이 같은 전송 프로세스 상태를 본다"""
+    return SenderSupervisor()
+
+def current_campaign(explicit: str = "") -> str:
+    """입력한 캠페인ID, 없으면 저장된 message.txt 본문 해시 (sender 기본값과 동일)"""
+    if explicit.strip():
+        return explicit.strip()
+    if MESSAGE_TXT.exists():
+        return campaign_for_message(MESSAGE_TXT.read_text(encoding="utf-8"))
+    return ""
+
+STARTED_KEY = "dm-started"   # 시작 직후 재실행해도 시작 안내를 한 번 보여주기 위한 세션 키
+
+def clear_delivery_history(campaign: str) -> int:
+    """캠페인의 발송 기록(INDEX_DB) 삭제 → 지운 기록 수. 지우면 이미 받은 ID에도 다시 보냄"""
+    index = DeliveryIndex(INDEX_DB, campaign)
+    try:
+        n = len(index.status)
+        index.reset()
+        return n
+    finally:
+        index.close()
+
+def run_sender_realtime(headless: bool, start: int, limit: int,
+                        offline: bool = False, reuse_profile: bool = False, campaign: str = "",
+                        profile: bool = False):
+    """전송 프로세스를 관리자(get_supervisor)를 통해 백그라운드로 시작만 하고,
+    화면은 실행 중인 동안 1초마다 자동 새로고침되며 로그와 현황을 렌더링한다."""
     if not SENDER_PY.exists():
         st.error(f"전송 스크립트를 찾을 수 없습니다: {SENDER_PY}")
         return
@@ -211,44 +408,98 @@ def run_sender_realtime(headless: bool, start: int, limit: int, reset_status: bo
         st.error("message.txt가 없습니다. 먼저 메시지를 저장하세요.")
         return
 
-    # 이미 실행 중이면 중복 실행 방지
-    if st.session_state.get("sender_running"):
+    # 이미 실행 중이면 중복 실행 방지 (다른 세션에서 시작한 실행 포함)
+    sup = get_supervisor()
+    if sup.snapshot()["running"]:
         st.info("이미 전송이 진행 중입니다. 아래 로그/대시보드를 확인하세요.")
         return
 
     cmd = [sys.executable, str(SENDER_PY)]
     if headless:
         cmd.append("--headless")
-    if reset_status:
-        cmd.append("--reset")
     cmd += ["--status-file", str(STATUS_JSON)]
+    cmd += ["--trace-file", str(TRACE_JSONL)]
+    cmd += ["--index-db", str(INDEX_DB)]
+    if campaign:
+        cmd += ["--campaign", campaign]
     if start and int(start) > 0:
         cmd += ["--start", str(int(start))]
     if limit and int(limit) > 0:
         cmd += ["--limit", str(int(limit))]
-
-    # 로그 파일 초기화
+    if offline:
+        cmd.append("--offline")
+    if reuse_profile:
+        cmd += ["--profile-dir", str(CHROME_PROFILE_DIR)]
+    PROFILE_OUT.unlink(missing_ok=True)   # 이전 실행 결과와 섞이지 않게
+    if profile:
+        cmd += ["--profile-out", str(PROFILE_OUT)]
+
+    # 트레이스 초기화 (STDOUT/STDERR 로그는 관리자가 새로 만든다)
     try:
-        LOG_OUT.write_text("", encoding="utf-8")
-        LOG_ERR.write_text("", encoding="utf-8")
+        TRACE_JSONL.write_text("", encoding="utf-8")
     except Exception:
         pass
 
-    # 백그라운드 실행 (출력 파일로 리다이렉트)
-    out_f = open(LOG_OUT, "a", encoding="utf-8", buffering=1)
-    err_f = open(LOG_ERR, "a", encoding="utf-8", buffering=1)
+    # 백그라운드 실행 — stdout은 파이프로 관리자에게, 관리자가 로그 파일로 기록
+    if not sup.start(cmd, LOG_OUT, LOG_ERR):
+        st.info("이미 전송이 진행 중입니다. 아래 로그/대시보드를 확인하세요.")
+        return
+    # 바로 다시 그려야 show() 맨 위에서 실행 중으로 보고 1초 자동 새로고침이 걸림
+    st.session_state[STARTED_KEY] = "전송을 시작했습니다. 로그/대시보드는 실행 중 1초마다 자동 새로고침됩니다."
+    st.rerun()
 
-    proc = subprocess.Popen(
-        cmd,
-        stdout=out_f,
-        stderr=err_f,
-        text=True,
-        bufsize=1,
-    )
 
-    st.session_state["sender_running"] = True
-    st.session_state["sender_pid"] = proc.pid
-    st.success("전송을 시작했습니다. 로그/대시보드는 1초마다 자동 새로고침됩니다.")
+# =========================
+# 단계별 소요시간(트레이스) 요약
+# =========================
+TRACE_STEPS = ["driver", "login", "ensure_compose", "fill", "confirm", "outcome", "send", "sleep", "recipient"]
+
+def load_trace(path: Path) -> pd.DataFrame:
+    """send_trace.jsonl → DataFrame (가장 최근 run만)"""
+    rows = []
+    if path.exists():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                rows.append(json.loads(line))
+            except Exception:
+                continue
+    tr = pd.DataFrame(rows, columns=["ts", "run", "idx", "id", "step", "ms", "outcome"])
+    if not tr.empty:
+        tr = tr[tr["run"] == tr["run"].iloc[-1]]
+    return tr
+
+def summarize_trace(tr: pd.DataFrame, pending: int, window: int = 20) -> Tuple[pd.DataFrame, float, float]:
+    """
+    단계별 p50/p95(ms) 표, 최근 window명 기준 처리량(명/분), 남은 대기 인원 ETA(초).
+    처리량을 계산할 수 없으면 0 / nan.
+    """
+    stats = (tr.groupby("step")["ms"]
+               .agg(건수="count", p50=lambda x: x.quantile(0.5), p95=lambda x: x.quantile(0.95))
+               .reindex([s for s in TRACE_STEPS if s in set(tr["step"])])
+               .round(1)
+               .reset_index()
+               .rename(columns={"step": "단계"}))
+
+    done = tr[tr["step"] == "recipient"].tail(window)
+    per_min, eta = 0.0, float("nan")
+    if len(done) >= 2:
+        span_s = float(done["ts"].iloc[-1] - done["ts"].iloc[0])
+        if span_s > 0:
+            per_min = (len(done) - 1) / span_s * 60.0
+            eta = pending / per_min * 60.0
+    return stats, per_min, eta
+
+def render_trace_stats(pending: int):
+    tr = load_trace(TRACE_JSONL)
+    if tr.empty:
+        return
+    stats, per_min, eta = summarize_trace(tr, pending)
+    st.markdown("##### ⏱ 단계별 소요시간 / 처리량")
+    c1, c2 = st.columns(2)
+    c1.metric("처리량(최근 20명)", f"{per_min:.1f} 명/분")
+    c2.metric("남은 예상 시간", "-" if eta != eta else time.strftime("%H:%M:%S", time.gmtime(eta)))
+    st.dataframe(stats.rename(columns={"p50": "p50(ms)", "p95": "p95(ms)"}),
+                 use_container_width=True, hide_index=True)
 
 
 def render_dashboard():
@@ -264,19 +515,33 @@ def render_dashboard():
             return
         df = pd.DataFrame(items)
 
+        # 상태/집계는 발송 결과 인덱스 기준 (행 순서와 무관, 이전 실행 성공 포함)
+        meta = data.get("meta", {})
+        idx_path = Path(meta.get("index_db") or INDEX_DB)
+        if meta.get("campaign") and idx_path.exists():
+            idx = DeliveryIndex(idx_path, meta["campaign"])
+            try:
+                df["status"] = df["id"].map(idx.get)
+                counts = idx.counts(df["id"])
+            finally:
+                idx.close()
+        else:
+            counts = df["status"].value_counts().to_dict()
+
         def lamp(s):
             return "🟢 성공" if s == "success" else ("🟡 실패" if s == "fail" else "🔴 대기")
         df["상태등"] = df["status"].map(lamp)
 
         c1, c2, c3, c4 = st.columns(4)
         total = len(df)
-        succ = int((df["status"] == "success").sum())
-        fail = int((df["status"] == "fail").sum())
+        succ = int(counts.get("success", 0))
+        fail = int(counts.get("fail", 0))
         pend = total - succ - fail
         c1.metric("총 대상", total)
         c2.metric("성공", succ)
         c3.metric("실패", fail)
         c4.metric("대기", pend)
+        render_trace_stats(pend)
 
         st.dataframe(
             df[["index", "id", "status", "상태등", "updated"]]
@@ -286,7 +551,7 @@ def render_dashboard():
         )
         st.download_button(
             "🖫 전송 현황(JSON) 다운로드",
-            data=STATUS_JSON.read_bytes(),
+            data=STATUS_JSON.read_bytes,   # 클릭 시점 파일 그대로 (1초 새로고침마다 바이트를 올리지 않음)
             file_name="send_status.json",
             mime="application/json",
             use_container_width=True,
@@ -300,12 +565,13 @@ def render_dashboard():
 # =========================
 def show():
     
-    # 실행 중이거나 현황 파일이 있으면 1초마다 자동 새로고침
+    # 실행 중일 때만 1초마다 자동 새로고침 (종료되면 마지막 상태를 그린 뒤 멈춤)
     try:
-        is_running = st.session_state.get("sender_running", False)
-        if is_running or STATUS_JSON.exists():
-            if st_autorefresh:
-                st_autorefresh(interval=1000, key="dm_autorefresh_dashboard", limit=None)
+        is_running = get_supervisor().snapshot()["running"]
+        if is_running:
+            # (선택) 자동 새로고침 — 필요할 때만 로드
+            from streamlit_autorefresh import st_autorefresh
+            st_autorefresh(interval=1000, key="dm_autorefresh_dashboard", limit=None)
     except Exception:
         pass
 
@@ -331,8 +597,19 @@ def show():
 
     # ── 우측: CSV 업로드 + 수동 ID
     with cB:
-        st.markdown("#### 원본 CSV 업로드")
-        up = st.file_uploader("CSV를 업로드하세요", type=["csv"])
+        st.markdown("#### 원본 CSV 업로드 (여러 날짜 파일이면 합산)")
+        ups = st.file_uploader("CSV를 업로드하세요", type=["csv"], accept_multiple_files=True)
+
+        # 하트 합계 탭에서 넘겨받은 합산이 있으면 업로드 없이 바로 사용 (업로드가 있으면 업로드 우선)
+        handoff = st.session_state.get(HANDOFF_KEY)
+        use_handoff = False
+        if handoff and not ups:
+            st.markdown("#### 또는: 하트 합계 탭에서 넘겨받은 후원자")
+            st.caption(f"{handoff['source']} — 후원자 {len(handoff['agg']):,}명 / {handoff['rows']:,}행 ({handoff['at']})")
+            use_handoff = st.checkbox("넘겨받은 합산으로 대상자 만들기", value=True, key="use-handoff")
+            if st.button("인계 해제", key="handoff-clear"):
+                st.session_state.pop(HANDOFF_KEY, None)
+                st.rerun()
 
         st.markdown("#### 또는: 수동 ID 입력 (테스트용)")
         manual_ids = st.text_area(
@@ -342,57 +619,79 @@ def show():
     auto_df = pd.DataFrame(columns=["후원아이디", "닉네임", "후원하트"])
     vip_df  = pd.DataFrame(columns=["후원아이디", "닉네임", "후원하트"])
 
-    # ── CSV 처리
-    if up is not None:
-        try:
-            raw = pd.read_csv(up)
-        except Exception:
-            up.seek(0)
-            raw = pd.read_csv(up, encoding="utf-8-sig")
-
-        st.markdown("---")
-        st.markdown("##### 1) 컬럼 매핑")
+    # ── CSV 처리 (또는 하트 합계 탭 인계분)
+    if ups or use_handoff:
+        if ups:
+            # 컬럼 매핑/혼합 감지는 첫 파일 앞부분 기준
+            raw = read_csv_head(ups[0])
+            raw.columns = [str(c).strip() for c in raw.columns]
 
-        id_guess, nick_guess, heart_guess = guess_columns(raw)
-        cols = list(raw.columns)
+            st.markdown("---")
+            st.markdown("##### 1) 컬럼 매핑")
 
-        # 안전한 기본 index
-        def idx_of(name, default=0):
-            try:
-                return cols.index(name)
-            except Exception:
-                return default
-
-        c1, c2, c3 = st.columns(3)
-        with c1:
-            id_col = st.selectbox("후원아이디 컬럼", options=cols, index=idx_of(id_guess, 0))
-        with c2:
-            nick_candidates = ["(없음)"] + cols
-            nick_index = 0 if not nick_guess else (cols.index(nick_guess) + 1)
-            nick_col = st.selectbox("닉네임 컬럼(없으면 '(없음)')", options=nick_candidates, index=nick_index)
-            nick_col = "" if nick_col == "(없음)" else nick_col
-        with c3:
-            heart_col = st.selectbox("후원하트 컬럼", options=cols, index=idx_of(heart_guess, len(cols)-1))
-
-        # 혼합 자동감지 + 토글
-        auto_mixed_guess = detect_mixed_id(raw[id_col])
-        force_mixed = st.checkbox(
-            "선택한 아이디 컬럼이 '아이디(닉네임)' 혼합 형식입니다",
-            value=auto_mixed_guess,
-            help="예: aa123(닉네임). 자동 감지 결과를 기본값으로 표시합니다.",
-        )
+            id_guess, nick_guess, heart_guess = guess_columns(raw)
+            cols = list(raw.columns)
 
-        auto_df, vip_df = prepare_from_csv(raw, id_col, nick_col, heart_col, force_mixed=force_mixed)
+            # 안전한 기본 index
+            def idx_of(name, default=0):
+                try:
+                    return cols.index(name)
+                except Exception:
+                    return default
+
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                id_col = st.selectbox("후원아이디 컬럼", options=cols, index=idx_of(id_guess, 0))
+            with c2:
+                nick_candidates = ["(없음)"] + cols
+                nick_index = 0 if not nick_guess else (cols.index(nick_guess) + 1)
+                nick_col = st.selectbox("닉네임 컬럼(없으면 '(없음)')", options=nick_candidates, index=nick_index)
+                nick_col = "" if nick_col == "(없음)" else nick_col
+            with c3:
+                heart_col = st.selectbox("후원하트 컬럼", options=cols, index=idx_of(heart_guess, len(cols)-1))
+
+            # 혼합 자동감지 + 토글
+            auto_mixed_guess = detect_mixed_id(raw[id_col])
+            force_mixed = st.checkbox(
+                "선택한 아이디 컬럼이 '아이디(닉네임)' 혼합 형식입니다",
+                value=auto_mixed_guess,
+                help="예: aa123(닉네임). 자동 감지 결과를 기본값으로 표시합니다.",
+            )
+
+        else:
+            st.markdown("---")
+            st.info(f"하트 합계 탭 인계: {handoff['source']} — 업로드/컬럼 매핑 없이 ID별 합계를 그대로 사용합니다.")
+
+        # 하트 구간(자동발송 하한 / VIP 하한)
+        t1, t2 = st.columns(2)
+        with t1:
+            auto_min = st.number_input("자동발송 최소 하트", min_value=0, value=int(HEART_TIER_EDGES[0]), step=100)
+        with t2:
+            vip_min = st.number_input("VIP 최소 하트", min_value=int(auto_min) + 1,
+                                      value=max(int(HEART_TIER_EDGES[1]), int(auto_min) + 1), step=1000)
+        tier_edges = (int(auto_min), int(vip_min))
+
+        if ups:
+            auto_df, vip_df = prepare_from_files(
+                ups, id_col, nick_col, heart_col, mixed=force_mixed, tier_edges=tier_edges,
+                on_skip=lambda name, why: st.warning(f"{name} 건너뜀 — {why}"),
+            )
+            vip_recipe = recipe_key("dm-vip", [uf.file_id for uf in ups], id_col, nick_col, heart_col,
+                                    force_mixed, tier_edges)
+        else:   # 이미 정규화된 ID별 합계 → 구간만 나눔
+            auto_df, vip_df = split_heart_tiers(handoff["agg"], tier_edges)
+            vip_recipe = recipe_key("dm-vip", handoff["source"], handoff["at"], handoff["rows"], tier_edges)
 
         # 미리보기
         st.markdown("##### 2) 추출 결과 미리보기")
         left, right = st.columns(2, gap="large")
         with left:
-            st.markdown("**🎯 자동 발송 대상 (1,000 ~ 9,999 하트)**")
-            st.caption(f"총 대상자: **{len(auto_df)}명** — 같은 ID는 합산 기준")
+            st.markdown(f"**🎯 자동 발송 대상 ({tier_label(tier_edges, 0)} 하트)**")
+            st.caption(f"총 대상자: **{len(auto_df)}명** — 같은 ID는 합산 기준 "
+                       f"({f'파일 {len(ups)}개' if ups else '하트 합계 탭 인계'})")
             st.dataframe(auto_df, use_container_width=True, hide_index=True)
         with right:
-            st.markdown("**👑 VIP (10,000+ 하트) — 수동 발송**")
+            st.markdown(f"**👑 VIP ({tier_label(tier_edges, 1)} 하트) — 수동 발송**")
             st.caption(f"총 VIP: **{len(vip_df)}명**")
             st.dataframe(vip_df, use_container_width=True, hide_index=True)
 
@@ -415,13 +714,14 @@ def show():
             save_local_bundle(auto_df, base_message, panda_id, panda_pw)
             st.success("저장 완료!")
 
-        # VIP CSV 다운로드
-        vip_csv = vip_df.to_csv(index=False).encode("utf-8-sig")
-        st.download_button("🖫 VIP 목록 CSV 다운로드", data=vip_csv, file_name="vip_list.csv",
+        # VIP CSV 다운로드 (같은 입력·구간이면 재실행 때 다시 만들지 않음 — 전송 중 1초 새로고침 포함)
+        artifacts = get_artifacts()
+        vip_key = artifacts.memo(vip_recipe, lambda: vip_df.to_csv(index=False).encode("utf-8-sig"))
+        st.download_button("🖫 VIP 목록 CSV 다운로드", data=artifacts.serve(vip_key), file_name="vip_list.csv",
                            mime="text/csv", use_container_width=True)
 
     # ── 수동 ID만으로 생성
-    if (up is None) and manual_ids.strip():
+    if not (ups or use_handoff) and manual_ids.strip():
         tokens = [t.strip() for t in re.split(r"[,\s]+", manual_ids) if t.strip()]
         tokens = list(dict.fromkeys(tokens))  # dedup, keep order
         auto_df = pd.DataFrame({"후원아이디": tokens, "닉네임": ["" for _ in tokens], "후원하트": [1000 for _ in tokens]})
@@ -448,8 +748,18 @@ def show():
         limit_cnt = st.number_input("최대 인원(0=전원)", min_value=0, value=0, step=1)
     with col3:
         headless = st.checkbox("헤드리스 실행", value=True)
-        reset_status = st.checkbox("현황 초기화", value=False)
+        reset_status = st.checkbox("현황 초기화", value=False,
+                                   help="대시보드 현황 파일(send_status.json)만 새로 만듭니다. "
+                                        "발송 기록은 그대로라 이미 성공한 ID는 계속 건너뜁니다.")
+        reuse_profile = st.checkbox("로그인 세션 재사용", value=False,
+                                    help="크롬 프로필을 보관해 다음 실행 때 로그인을 건너뜁니다.")
+        offline = st.checkbox("오프라인(드라이버 조회 안 함)", value=False,
+                              help="캐시된 chromedriver 또는 PATH의 chromedriver만 사용합니다.")
+        profile_run = st.checkbox("프로파일 실행", value=False,
+                                  help="이번 전송 배치를 cProfile로 측정합니다 (끝나면 아래에 상위 함수 표).")
     with col4:
+        campaign_in = st.text_input("캠페인 ID (비우면 메시지 기준)", value="",
+                                    help="같은 캠페인에서 이미 성공한 ID는 CSV를 다시 만들어도 건너뜁니다.")
         if st.button("📨 전송 실행", use_container_width=True):
             # 현황 초기화 옵션일 때 파일 제거
             if reset_status:
@@ -458,40 +768,77 @@ def show():
                 except Exception:
                     pass
 
-            # 전송 전 seed 현황(대기 상태) 생성 → 대시보드가 즉시 보임
+            # 전송 전 seed 현황 생성 → 대시보드가 즉시 보임 (기존 성공 여부는 sender가 인덱스로 반영)
+            campaign = current_campaign(campaign_in)
             if RECIP_CSV.exists():
                 try:
                     df_seed = pd.read_csv(RECIP_CSV)
                     st_json = {
                         "items": [
-                            {"index": int(i), "id": str(r["후원아이디"]),
+                            {"index": int(i), "id": normalize_rid(r["후원아이디"]),
                              "status": "pending", "updated": now_ts()}
                             for i, r in df_seed.iterrows()
                         ],
-                        "meta": {"created": now_ts()},
+                        "meta": {"created": now_ts(), "campaign": campaign,
+                                 "index_db": str(INDEX_DB)},
                     }
                     save_status(STATUS_JSON, st_json)
                 except Exception:
                     pass
 
-            run_sender_realtime(headless=headless, start=start_idx, limit=limit_cnt, reset_status=reset_status)
+            run_sender_realtime(headless=headless, start=start_idx, limit=limit_cnt,
+                                offline=offline, reuse_profile=reuse_profile, campaign=campaign,
+                                profile=profile_run)
+
+    # 발송 기록 삭제는 현황 초기화와 분리 — 캠페인 ID를 직접 입력해야 누를 수 있음
+    with st.expander("🗑 발송 기록 삭제 (이미 보낸 사람에게도 다시 보내게 됨)"):
+        campaign_now = current_campaign(campaign_in)
+        st.warning(f"캠페인 `{campaign_now}` 의 발송 기록(성공/실패)을 {INDEX_DB.name} 에서 지웁니다. "
+                   "지운 뒤 전송하면 이미 받은 사람에게도 같은 쪽지를 다시 보냅니다.")
+        confirm = st.text_input("확인: 위 캠페인 ID를 그대로 입력하세요", value="", key="history-confirm")
+        busy = get_supervisor().snapshot()["running"]
+        if st.button("발송 기록 삭제", key="history-clear",
+                     disabled=busy or not campaign_now or confirm.strip() != campaign_now):
+            n = clear_delivery_history(campaign_now)
+            st.success(f"캠페인 {campaign_now} 발송 기록 {n:,}건을 삭제했습니다.")
+        if busy:
+            st.caption("전송 중에는 삭제할 수 없습니다.")
+        elif not campaign_now:
+            st.caption("캠페인 ID를 입력하거나 메시지를 저장하면 삭제할 수 있습니다.")
 
     st.markdown("---")
     render_dashboard()
     st.markdown("### ⏹ 실행 제어")
-    if st.button("강제 종료"):
-        pid = st.session_state.get("sender_pid")
-        if pid:
-            try:
-                # Windows 호환 강제 종료
-                if os.name == "nt":
-                    subprocess.run(["taskkill", "/PID", str(pid), "/F", "/T"])
-                else:
-                    os.kill(pid, 9)
+    started = st.session_state.pop(STARTED_KEY, None)
+    if started:
+        st.success(started)
+    sup = get_supervisor()
+    snap = sup.snapshot()
+    if snap["running"]:
+        prog = snap["progress"]
+        st.info(f"실행 중 (PID {snap['pid']}) — 전송 {prog.get('sent', 0)} / 성공 {prog.get('success', 0)}"
+                f" / 실패 {prog.get('fail', 0)} / 건너뜀 {prog.get('skipped', 0)}")
+    elif snap["exit_code"] is not None:
+        msg = f"종료됨 (exit code {snap['exit_code']}, {time.strftime('%H:%M:%S', time.localtime(snap['ended']))})"
+        (st.success if snap["exit_code"] == 0 else st.warning)(msg)
+    if st.button("강제 종료", disabled=not snap["running"]):
+        try:
+            # 프로세스 그룹(크롬/chromedriver 포함) 전체 종료
+            if sup.kill():
                 st.success("프로세스를 강제 종료했습니다.")
+        except Exception as e:
+            st.error(f"종료 실패: {e}")
+
+    if not snap["running"] and PROFILE_OUT.exists():
+        with st.expander("🔬 전송 프로파일 (누적시간 상위)", expanded=False):
+            try:
+                from profile_capture import load_stats, top_functions
+                st.dataframe(pd.DataFrame(top_functions(load_stats(PROFILE_OUT), 40)),
+                             use_container_width=True, hide_index=True)
+                st.download_button("📥 원본 프로파일(.prof) 다운로드", data=PROFILE_OUT.read_bytes,
+                                   file_name=PROFILE_OUT.name, mime="application/octet-stream")
             except Exception as e:
-                st.error(f"종료 실패: {e}")
-        st.session_state["sender_running"] = False
+                st.info(f"프로파일을 읽을 수 없습니다: {e}")
 
     st.markdown("#### 🧹 현황/임시 파일 관리")
     st.markdown("---")
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+donations.py
+- 후원 내보내기 원본 표 → 정규화 후원 표 / (참여BJ, ID, 닉네임)별 합계 (Streamlit 없이 pandas 만)
+    하트 합계 탭(heart_aggregate), 쪽지 탭(dm_ui) CSV 업로드, 병렬 CSV 워커(parallel_csv)가 같은 규칙으로 분리·정규화
+- '후원 아이디(닉네임)' 분리 정규식은 여기 하나뿐 (＠ → @, 닉네임은 normalize_nick)
+"""
+
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+SHEET_COL = "시트"   # 모든 시트 모드에서 행마다 붙는 원본 시트명 컬럼
+
+
+def match_date(name: str) -> str | None:
+    """파일/시트 이름에서 날짜(YYYY-MM-DD) 추출, 없으면 None"""
+    s = str(name).lower()
+    m = re.search(r'(20\d{2})[.\-_](\d{1,2})[.\-_](\d{1,2})', s)
+    if m: return f"{int(m[1]):04d}-{int(m[2]):02d}-{int(m[3]):02d}"
+    m = re.search(r'(20\d{2})(\d{2})(\d{2})', s)
+    if m: return f"{int(m[1]):04d}-{int(m[2]):02d}-{int(m[3]):02d}"
+    m = re.search(r'(\d{2})[.\-_](\d{1,2})[.\-_](\d{1,2})', s)
+    if m: return f"{2000+int(m[1]):04d}-{int(m[2]):02d}-{int(m[3]):02d}"
+    m = re.search(r'(\d{1,2})(\d{2})', s)
+    if m and len(m.group(0)) == 4:
+        y = datetime.now().year
+        return f"{y:04d}-{int(m[1]):02d}-{int(m[2]):02d}"
+    return None
+
+
+def normalize_nick(nick: str) -> str:
+    if not isinstance(nick, str):
+        return ""
+    nick = re.sub(r'^\[.*?\]', '', nick)
+    nick = re.sub(r'\(.*?\)', '', nick)
+    return nick.strip()
+
+
+def _clean_heart(u: pd.Series) -> np.ndarray:
+    """'1,000' / 1000 / 1000.0 → 같은 정수 (문자열/숫자 파일이 섞여도 같은 지문)"""
+    num = pd.to_numeric(u, errors="coerce")
+    if num.isna().any():   # 천 단위 쉼표 등 문자열만 다시 해석
+        num = num.fillna(pd.to_numeric(u.astype(str).str.replace(",", "", regex=False), errors="coerce"))
+    return num.fillna(0).to_numpy(dtype=np.int64)
+
+
+def heart_values(values: pd.Series) -> np.ndarray:
+    """후원하트 컬럼 → int64 (숫자 컬럼은 그대로, 문자열은 고유값만 해석)"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.fillna(0).to_numpy(dtype=np.int64)
+    codes, uniq = pd.factorize(values)
+    return np.append(_clean_heart(pd.Series(np.asarray(uniq, dtype=object))), 0)[codes]
+
+
+MIX_COL = "후원 아이디(닉네임)"
+MIX_PATTERN = r'^\s*(?P<ID>[^()]+?)(?:\((?P<NICK>.*)\))?\s*$'
+DONATION_COLS = ["날짜", "후원시간", "참여BJ", "ID", "닉네임", "후원하트", "구분"]
+
+
+def split_donor_column(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """'아이디(닉네임)' → (ID, 닉네임) 배열. 같은 후원자가 여러 줄 나오므로 정규식/닉 정리는 고유값에만"""
+    codes, uniq = pd.factorize(values, use_na_sentinel=False)
+    sp = pd.Series(np.asarray(uniq, dtype=object)).astype(str).str.extract(MIX_PATTERN)
+    ids = sp["ID"].fillna("").str.replace("＠", "@", regex=False).str.strip()
+    nicks = sp["NICK"].fillna("").map(normalize_nick)
+    return ids.to_numpy(dtype=object)[codes], nicks.to_numpy(dtype=object)[codes]
+
+
+def normalize_donations(df: pd.DataFrame, date_str: str, by_sheet: bool = False) -> pd.DataFrame:
+    """
+    읽어 온 원본 표 → 정규화 후원 표(DONATION_COLS 중 있는 컬럼) — 업로드당 한 번만 만들고
+    단일 파일 ZIP / 총합산 요약 / TOP-K 색인 / 쪽지 탭 대상자가 모두 이 표에서 파생
+    - ID·닉네임 분리, 하트 int64, 참여BJ 공백 정리, 구분(ID에 @ → 제휴하트)
+    - 날짜: by_sheet(모든 시트 모드)면 시트 이름의 날짜, 없으면 date_str
+    """
+    df.columns = [str(c).strip() for c in df.columns]
+    if MIX_COL not in df.columns:
+        raise ValueError(f"'{MIX_COL}' 컬럼이 없습니다.")
+    out = pd.DataFrame(index=df.index)
+    if by_sheet and SHEET_COL in df.columns:
+        sheet_dates = {t: match_date(t) or date_str for t in df[SHEET_COL].unique()}
+        out["날짜"] = df[SHEET_COL].map(sheet_dates)
+    else:
+        out["날짜"] = date_str
+    if "후원시간" in df.columns:
+        out["후원시간"] = df["후원시간"]
+    if "참여BJ" in df.columns:
+        out["참여BJ"] = df["참여BJ"].astype(str).str.strip()
+    out["ID"], out["닉네임"] = split_donor_column(df[MIX_COL])
+    if "후원하트" in df.columns:
+        out["후원하트"] = heart_values(df["후원하트"])
+    out["구분"] = np.where(out["ID"].str.contains("@", regex=False), "제휴하트", "일반하트")
+    return out
+
+
+DONOR_KEYS = ["참여BJ", "ID", "닉네임"]
+
+
+def sum_by_donor(table: pd.DataFrame) -> pd.DataFrame:
+    """정규화 후원 표(또는 부분합들을 이어 붙인 표) → (참여BJ, ID, 닉네임)별 후원하트 합 (키 오름차순)"""
+    return table.groupby(DONOR_KEYS, as_index=False)["후원하트"].sum()
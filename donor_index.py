@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+donor_index.py
+- (날짜, 정규화 BJ, 후원아이디) 하트 인덱스 → 임의의 BJ 묶음/날짜 범위 TOP-K 후원자 조회
+- 업로드 파일(소스)마다 부분 집계를 따로 보관: 새 날짜 파일은 그 파일만 집계해 추가,
+  빠진 파일은 그 부분만 제거 (전체 재집계 없음)
+- 조회는 선택 범위를 np.bincount 로 합산한 뒤 np.argpartition 으로 상위 K개만 골라 정렬 (전체 정렬 없음)
+- ID → 후원 내역(postings) 역색인 + ID/닉네임 앞부분 검색 (정렬된 키 + bisect, 조회당 O(log n))
+- heart_aggregate 여러 파일 합산 흐름에서 st.session_state 에 두고 사용, 갱신 때마다 DONOR_INDEX_FILE 로 저장
+"""
+
+import json, bisect
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DONOR_INDEX_FILE = Path(__file__).with_name("donor_index.npz")
+PART_KEYS = ("date", "bj", "id", "hearts")
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """값이 큰 순서의 상위 k개 위치 (argpartition 후 k개만 정렬)"""
+    if k <= 0 or len(values) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(values):
+        idx = np.argpartition(-values, k - 1)[:k]
+    else:
+        idx = np.arange(len(values))
+    return idx[np.argsort(-values[idx], kind="stable")]
+
+
+class DonorIndex:
+    """
+    문자열(날짜/BJ/ID)은 전역 코드로 바꿔 보관하고, 소스마다 (date, bj, id, hearts) 정수 배열 1벌.
+    add() 에 넘기는 표: 날짜 / 참여BJ(정규화된 값) / ID / 닉네임 / 후원하트
+    """
+
+    def __init__(self):
+        self.codes = {"date": {}, "bj": {}, "id": {}}
+        self.names = {"date": [], "bj": [], "id": []}
+        self.nicks: dict[int, str] = {}
+        self.parts: dict[str, dict] = {}
+        self.version = 0        # add/remove 때마다 증가 → 역색인 재생성 판단
+        self._inv = None        # (version, 역색인 dict)
+
+    # ----- 코드 사전 -----
+    def _encode(self, kind: str, values: pd.Series) -> np.ndarray:
+        """고유값만 사전에 등록하고 행 전체는 factorize 코드로 펼침"""
+        local, uniq = pd.factorize(values.fillna("").astype(str))
+        table, names = self.codes[kind], self.names[kind]
+        glob = np.empty(len(uniq), dtype=np.int64)
+        for j, u in enumerate(uniq):
+            c = table.get(u)
+            if c is None:
+                c = table[u] = len(names)
+                names.append(u)
+            glob[j] = c
+        return glob[local]
+
+    # ----- 갱신 -----
+    def add(self, source: str, df: pd.DataFrame) -> bool:
+        """소스 하나 집계해 추가. 이미 있는 소스면 False (재실행 시 중복 집계 방지)"""
+        if source in self.parts:
+            return False
+        d = self._encode("date", df["날짜"])
+        b = self._encode("bj", df["참여BJ"])
+        i = self._encode("id", df["ID"])
+        h = pd.to_numeric(df["후원하트"].astype(str).str.replace(",", "", regex=False),
+                          errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+        # 소스 안에서 (날짜, BJ, ID) 단위로 미리 합산 → 원본 행보다 훨씬 작음
+        nb, ni = len(self.names["bj"]), len(self.names["id"])
+        key = (d * nb + b) * ni + i
+        ukey, inv = np.unique(key, return_inverse=True)
+        self.parts[source] = {
+            "date": ukey // (nb * ni), "bj": ukey // ni % nb, "id": ukey % ni,
+            "hearts": np.bincount(inv, weights=h, minlength=len(ukey)).astype(np.int64),
+        }
+        if "닉네임" in df.columns:   # ID별 마지막으로 본 닉네임
+            nick = df["닉네임"].fillna("").astype(str)
+            last = pd.Series(nick.to_numpy(), index=i)[nick.to_numpy() != ""]
+            last = last[~last.index.duplicated(keep="last")]
+            self.nicks.update(zip(last.index.tolist(), last.tolist()))
+        self.version += 1
+        return True
+
+    def remove(self, source: str) -> None:
+        if self.parts.pop(source, None) is not None:
+            self.version += 1
+
+    def sync(self, sources) -> list:
+        """현재 업로드 목록에 없는 소스 제거 → 제거된 소스 목록"""
+        gone = [s for s in self.parts if s not in set(sources)]
+        for s in gone:
+            self.remove(s)
+        return gone
+
+    # ----- 저장/불러오기 -----
+    def save(self, path=DONOR_INDEX_FILE) -> None:
+        """정수 배열은 npz, 문자열 사전/닉네임/소스 목록은 JSON 바이트로 같은 파일에 (pickle 없음)"""
+        srcs = list(self.parts)
+        arrays = {k: np.concatenate([self.parts[s][k] for s in srcs]) if srcs else np.empty(0, np.int64)
+                  for k in PART_KEYS}
+        arrays["sizes"] = np.array([len(self.parts[s]["id"]) for s in srcs], dtype=np.int64)
+        meta = {"names": self.names, "nicks": {str(k): v for k, v in self.nicks.items()}, "sources": srcs}
+        arrays["meta"] = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+        tmp = Path(path).with_suffix(".tmp.npz")
+        np.savez_compressed(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path=DONOR_INDEX_FILE) -> "DonorIndex":
+        idx = cls()
+        with np.load(path) as z:
+            meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+            cols = {k: z[k] for k in PART_KEYS}
+            bounds = np.concatenate(([0], np.cumsum(z["sizes"])))
+        idx.names = meta["names"]
+        idx.codes = {kind: {n: c for c, n in enumerate(names)} for kind, names in idx.names.items()}
+        idx.nicks = {int(k): v for k, v in meta["nicks"].items()}
+        for j, src in enumerate(meta["sources"]):
+            idx.parts[src] = {k: cols[k][bounds[j]:bounds[j + 1]] for k in PART_KEYS}
+        idx.version = 1
+        return idx
+
+    # ----- 역색인 (ID → 후원 내역) -----
+    def _inverted(self) -> dict:
+        """모든 소스를 ID 순으로 한 번 정렬해 CSR(offsets) 형태로 보관 + 검색용 정렬 키. version 이 바뀔 때만 재생성."""
+        if self._inv is not None and self._inv[0] == self.version:
+            return self._inv[1]
+        ni = len(self.names["id"])
+        if self.parts:
+            cols = {k: np.concatenate([p[k] for p in self.parts.values()]) for k in PART_KEYS}
+        else:
+            cols = {k: np.empty(0, dtype=np.int64) for k in PART_KEYS}
+        order = np.argsort(cols["id"], kind="stable")
+        post = {k: cols[k][order] for k in ("date", "bj", "hearts")}
+        offsets = np.searchsorted(cols["id"][order], np.arange(ni + 1))
+        live = np.flatnonzero(np.diff(offsets) > 0)          # 현재 소스에 내역이 있는 ID만
+        totals = np.add.reduceat(post["hearts"], offsets[live]) if len(live) else np.empty(0, np.int64)
+        total = np.zeros(ni, dtype=np.int64)
+        total[live] = totals
+        id_keys = sorted((self.names["id"][c].lower(), int(c)) for c in live)
+        nick_keys = sorted((self.nicks[c].lower(), int(c)) for c in live.tolist() if self.nicks.get(c))
+        inv = {"post": post, "offsets": offsets, "total": total,
+               "id_keys": [k for k, _ in id_keys], "id_codes": np.array([c for _, c in id_keys], dtype=np.int64),
+               "nick_keys": [k for k, _ in nick_keys], "nick_codes": np.array([c for _, c in nick_keys], dtype=np.int64)}
+        self._inv = (self.version, inv)
+        return inv
+
+    @staticmethod
+    def _prefix(keys: list, codes: np.ndarray, q: str) -> np.ndarray:
+        """정렬된 키 목록에서 q 로 시작하는 항목 전부의 코드 (bisect 두 번 → 코드 배열 슬라이스)"""
+        lo = bisect.bisect_left(keys, q)
+        hi = bisect.bisect_left(keys, q + "\U0010ffff")
+        return codes[lo:hi]
+
+    def search(self, query: str, limit: int = 50) -> pd.DataFrame:
+        """ID 또는 닉네임 앞부분 일치(대소문자 무시) → ID별 요약 (총하트 내림차순)"""
+        q = str(query).strip().lower()
+        cols = ["ID", "닉네임", "총하트", "BJ수", "날짜수", "구분"]
+        if not q:
+            return pd.DataFrame(columns=cols)
+        inv = self._inverted()
+        codes = np.unique(np.concatenate([self._prefix(inv["id_keys"], inv["id_codes"], q),
+                                          self._prefix(inv["nick_keys"], inv["nick_codes"], q)]))
+        # 사전순 앞쪽 limit 개가 아니라 일치하는 전체 중 총하트 상위 limit 개
+        codes = codes[top_k_indices(inv["total"][codes], limit)]
+        rows = []
+        for c in codes:
+            a, b = inv["offsets"][c], inv["offsets"][c + 1]
+            name = self.names["id"][c]
+            rows.append((name, self.nicks.get(c, ""), inv["total"][c],
+                         len(np.unique(inv["post"]["bj"][a:b])), len(np.unique(inv["post"]["date"][a:b])),
+                         "제휴하트" if "@" in name else "일반하트"))
+        return pd.DataFrame(rows, columns=cols)
+
+    def postings(self, rid: str) -> pd.DataFrame:
+        """한 ID 의 (날짜, 참여BJ)별 하트 내역 — 같은 날짜·BJ가 여러 소스에 있으면 합산"""
+        cols = ["날짜", "참여BJ", "후원하트", "구분"]
+        c = self.codes["id"].get(str(rid))
+        if c is None:
+            return pd.DataFrame(columns=cols)
+        inv = self._inverted()
+        a, b = inv["offsets"][c], inv["offsets"][c + 1]
+        df = pd.DataFrame({
+            "날짜": [self.names["date"][x] for x in inv["post"]["date"][a:b]],
+            "참여BJ": [self.names["bj"][x] for x in inv["post"]["bj"][a:b]],
+            "후원하트": inv["post"]["hearts"][a:b],
+        })
+        df = df.groupby(["날짜", "참여BJ"], as_index=False)["후원하트"].sum().sort_values(["날짜", "참여BJ"])
+        df["구분"] = "제휴하트" if "@" in str(rid) else "일반하트"
+        return df.reset_index(drop=True)
+
+    # ----- 조회 -----
+    def dates(self) -> list:
+        used = set()
+        for p in self.parts.values():
+            used.update(np.unique(p["date"]).tolist())
+        return sorted(self.names["date"][c] for c in used)
+
+    def bjs(self) -> list:
+        used = set()
+        for p in self.parts.values():
+            used.update(np.unique(p["bj"]).tolist())
+        return sorted(self.names["bj"][c] for c in used)
+
+    def _select(self, bjs=None, date_from=None, date_to=None):
+        """선택 범위의 (bj, id, hearts) 배열"""
+        if not self.parts:
+            z = np.empty(0, dtype=np.int64)
+            return z, z, z
+        d = np.concatenate([p["date"] for p in self.parts.values()])
+        b = np.concatenate([p["bj"] for p in self.parts.values()])
+        i = np.concatenate([p["id"] for p in self.parts.values()])
+        h = np.concatenate([p["hearts"] for p in self.parts.values()])
+        # 코드 → 허용 여부 조회표 (행마다 문자열 비교하지 않음)
+        ok_d = np.array([(date_from is None or s >= date_from) and (date_to is None or s <= date_to)
+                         for s in self.names["date"]], dtype=bool)
+        mask = ok_d[d]
+        if bjs:
+            want = set(bjs)
+            ok_b = np.array([s in want for s in self.names["bj"]], dtype=bool)
+            mask &= ok_b[b]
+        return b[mask], i[mask], h[mask]
+
+    def top_k(self, k: int = 20, bjs=None, date_from=None, date_to=None, per_bj: bool = False) -> pd.DataFrame:
+        """
+        TOP-K 후원자 표
+        - per_bj=False: 선택한 BJ들을 합친 ID별 합계 상위 K
+        - per_bj=True : BJ마다 ID별 합계 상위 K
+        """
+        b, i, h = self._select(bjs, date_from, date_to)
+        ni = len(self.names["id"])
+        key = b * ni + i if per_bj else i
+        ukey, inv = np.unique(key, return_inverse=True)
+        tot = np.bincount(inv, weights=h, minlength=len(ukey)).astype(np.int64)
+
+        rows = []
+        if per_bj:
+            ub = ukey // ni
+            for bc in np.unique(ub):
+                pos = np.flatnonzero(ub == bc)
+                for rank, j in enumerate(pos[top_k_indices(tot[pos], k)], 1):
+                    rows.append((self.names["bj"][bc], rank, int(ukey[j] % ni), int(tot[j])))
+        else:
+            for rank, j in enumerate(top_k_indices(tot, k), 1):
+                rows.append(("", rank, int(ukey[j]), int(tot[j])))
+
+        out = pd.DataFrame({
+            "참여BJ": [r[0] for r in rows],
+            "순위": [r[1] for r in rows],
+            "ID": pd.Series([self.names["id"][r[2]] for r in rows], dtype=str),
+            "닉네임": [self.nicks.get(r[2], "") for r in rows],
+            "후원하트": np.array([r[3] for r in rows], dtype=np.int64),
+        })
+        out["구분"] = np.where(out["ID"].str.contains("@", regex=False), "제휴하트", "일반하트")
+        return out if per_bj else out.drop(columns="참여BJ")
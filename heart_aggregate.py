@@ -1,12 +1,277 @@
 # heart_aggregate.py
-import io, re, csv, zipfile, unicodedata
+import io, re, csv, time, zipfile, unicodedata, importlib.util
 import numpy as np
 import pandas as pd
 import streamlit as st
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
 from datetime import datetime
 
+from donations import SHEET_COL, match_date, heart_values, _clean_heart, normalize_donations, sum_by_donor
+from donor_index import DonorIndex, DONOR_INDEX_FILE
+from profile_capture import ProfileCapture
+from parallel_csv import aggregate_upload_parallel, parallel_by_default, usable_workers
+from artifact_store import get_artifacts, recipe_key
+
+ALL_SHEETS = "*"     # read_any_table / read_xlsx_streaming 에 넘기면 모든 시트를 한 번에 읽음
+
+
+# ===== 공용 유틸 (show() 밖: 벤치마크 등에서도 import 가능) =====
+def extract_date_from_name(name: str) -> str:
+    """이름에서 날짜 추출, 없으면 오늘 날짜"""
+    return match_date(name) or datetime.now().strftime("%Y-%m-%d")
+
+
+def sanitize(name: str) -> str:
+    return re.sub(r'[\\/*?:\[\]]', "_", str(name))[:31] or "BJ"
+
+
+# ===== 내보내기 (사람용 XLSX / 도구용 CSV·Parquet 묶음) =====
+EXPORT_FORMATS = {
+    "xlsx": "엑셀 (XLSX, 사람용 서식)",
+    "csv": "CSV 묶음 (ZIP, UTF-8 BOM)",
+}
+if importlib.util.find_spec("pyarrow") is not None:   # 없으면 선택지에서 빼서 고른 뒤 오류 나지 않게
+    EXPORT_FORMATS["parquet"] = "Parquet (ZIP, BJ별 파티션)"
+
+
+def pack_zip(files: dict[str, bytes]) -> bytes:
+    zbio = io.BytesIO()
+    with zipfile.ZipFile(zbio, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for fname, data in files.items():
+            zf.writestr(fname, data)
+    zbio.seek(0); return zbio.getvalue()
+
+
+def csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode("utf-8-sig")   # BOM: 엑셀에서 열어도 한글 안 깨짐
+
+
+def parquet_bytes(df: pd.DataFrame) -> bytes:
+    bio = io.BytesIO()
+    try:
+        df.to_parquet(bio, index=False)
+    except ImportError as e:
+        raise ValueError("Parquet 내보내기에는 pyarrow 가 필요합니다 (pip install pyarrow)") from e
+    return bio.getvalue()
+
+
+def columnar_files(summaries: dict, blocks: pd.DataFrame, part_col: str, fmt: str) -> dict[str, bytes]:
+    """
+    요약 표 + 파티션 컬럼별 블록을 워크북 없이 바로 파일로
+    - csv    : {요약}.csv + {값}.csv (파티션 컬럼은 파일명으로, 본문에서는 제외)
+    - parquet: {요약}.parquet + {part_col}={값}/part-0.parquet (Hive 파티션, 값은 URI 인코딩)
+    """
+    from urllib.parse import quote
+    files = {}
+    for name, df in summaries.items():
+        files[f"{name}.{fmt}"] = csv_bytes(df) if fmt == "csv" else parquet_bytes(df)
+    for key, sub in blocks.groupby(part_col, sort=False):   # 한 번의 groupby 로 블록 분할
+        sub = sub.drop(columns=part_col)
+        if fmt == "csv":
+            files[f"{sanitize(key)}.csv"] = csv_bytes(sub)
+        else:
+            files[f"{part_col}={quote(str(key), safe='')}/part-0.parquet"] = parquet_bytes(sub)
+    return files
+
+
+def normalize_bj(name: str) -> str:
+    if not isinstance(name, str):
+        return ""
+    return re.sub(r'^\[.*?\]', '', name).strip()
+
+
+def normalize_bj_column(values: pd.Series) -> pd.Series:
+    """normalize_bj 를 고유값에만 적용해 컬럼 전체로 펼침"""
+    uniq = values.dropna().unique()
+    return values.map(dict(zip(uniq, map(normalize_bj, uniq)))).fillna("")
+
+
+def minutes_of_day(values: pd.Series) -> np.ndarray:
+    """
+    후원시간 → 자정 기준 분(0~1439), 해석 불가 = -1
+    - datetime 컬럼은 그대로, 문자열은 고유값만 정규식으로 해석 후 codes로 펼침 (행 단위 파이썬 없음)
+    - '2025-10-03 14:05:09', '14:05', '오후 2:05', '2:05 PM' 형식 지원
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        hm = values.dt.hour * 60 + values.dt.minute
+        return hm.fillna(-1).to_numpy(dtype=np.int64)
+    codes, uniq = pd.factorize(values.astype(str))
+    u = pd.Series(uniq, dtype=object)
+    hm = u.str.extract(r'(\d{1,2}):(\d{2})').astype(float)
+    h, m = hm[0].to_numpy(), hm[1].to_numpy()
+    pm = u.str.contains(r'오후|pm', case=False, regex=True).to_numpy()
+    am = u.str.contains(r'오전|am', case=False, regex=True).to_numpy()
+    h = np.where(pm & (h < 12), h + 12, np.where(am & (h == 12), 0, h))
+    mins = h * 60 + m
+    mins = np.where(np.isnan(mins) | (mins < 0) | (mins >= 1440), -1, mins).astype(np.int64)
+    return np.append(mins, -1)[codes]   # 결측(code=-1) → 마지막 칸 -1
+
+
+def hourly_histogram(merged: pd.DataFrame, bin_minutes: int = 60) -> tuple[pd.DataFrame, int]:
+    """
+    (정규화 BJ, 날짜)별 시간대 하트 분포 → (표, 시간 해석 불가 행 수)
+    - bin_minutes: 60(시간별) 또는 10(10분별) 등 1440의 약수
+    - 그룹/구간 번호를 하나의 평탄 인덱스로 만든 뒤 np.bincount(weights=후원하트) 한 번으로 집계
+    """
+    nbins = 1440 // bin_minutes
+    mins = minutes_of_day(merged["후원시간"])
+    ok = mins >= 0
+    # (BJ, 날짜) 그룹 번호: 각 컬럼을 따로 factorize → 정수 조합 → np.unique (MultiIndex/행 단위 정규화 없음)
+    bj_codes, bj_uniq = pd.factorize(merged["참여BJ"].fillna("").astype(str))
+    norm_codes, norm_uniq = pd.factorize(pd.Series(bj_uniq, dtype=object).map(normalize_bj), sort=True)
+    d_codes, d_uniq = pd.factorize(merged["날짜"].fillna("").astype(str), sort=True)
+    nd = max(len(d_uniq), 1)
+    pair = norm_codes[bj_codes[ok]].astype(np.int64) * nd + d_codes[ok]
+    gkeys, gcodes = np.unique(pair, return_inverse=True)
+    hearts = pd.to_numeric(merged["후원하트"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)[ok]
+    flat = gcodes * nbins + mins[ok] // bin_minutes
+    grid = np.bincount(flat, weights=hearts, minlength=len(gkeys) * nbins).reshape(len(gkeys), nbins)
+
+    labels = ([f"{b:02d}시" for b in range(24)] if bin_minutes == 60 else
+              [f"{b * bin_minutes // 60:02d}:{b * bin_minutes % 60:02d}" for b in range(nbins)])
+    out = pd.DataFrame(grid.astype(np.int64), columns=labels)
+    out.insert(0, "날짜", np.asarray(d_uniq, dtype=object)[gkeys % nd])
+    out.insert(0, "참여BJ", np.asarray(norm_uniq, dtype=object)[gkeys // nd])
+    out["합계"] = out[labels].sum(axis=1)
+    return out, int((~ok).sum())
+
+
+FINGERPRINT_COLS = ["날짜", "후원시간", "참여BJ", "ID", "후원하트"]
+
+
+def _unique_hash(values: pd.Series, clean) -> np.ndarray:
+    """컬럼 고유값만 정리(clean: Series → 배열)·해시한 뒤 factorize 코드로 펼침 → 행마다 uint64"""
+    codes, uniq = pd.factorize(values)
+    uniq = pd.concat([pd.Series(np.asarray(uniq, dtype=object)), pd.Series([""], dtype=object)],
+                     ignore_index=True)   # 마지막 칸 = 결측(code=-1)
+    return pd.util.hash_array(np.asarray(clean(uniq)))[codes]
+
+
+def _clean_text(u: pd.Series) -> np.ndarray:
+    return u.astype(str).str.strip().to_numpy(dtype=object)
+
+
+def _clean_bj(u: pd.Series) -> np.ndarray:
+    return normalize_bj_column(u.astype(str)).to_numpy(dtype=object)
+
+
+def row_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """정규화한 (날짜, 후원시간, 참여BJ, ID, 후원하트) → 행마다 uint64 지문 (없는 컬럼은 빈 값)"""
+    cleaners = {"참여BJ": _clean_bj, "후원하트": _clean_heart}
+    key = {}
+    for c in FINGERPRINT_COLS:
+        if c not in df.columns:
+            key[c] = np.zeros(len(df), dtype=np.uint64)
+        else:
+            key[c] = _unique_hash(df[c], cleaners.get(c, _clean_text))
+    return pd.util.hash_pandas_object(pd.DataFrame(key), index=False).to_numpy()
+
+
+def detect_overlaps(names: list, frames: list, drop: bool = False) -> tuple[list, pd.DataFrame]:
+    """
+    여러 파일의 행 지문을 한 번에 factorize 해 중복 판정 (해시 테이블 1개, 선형 시간, 행당 지문 8바이트)
+    - 파일 내 중복: 같은 파일 안에서 다시 나온 행 (보고만)
+    - 앞 파일과 겹침: 업로드 순서상 앞선 파일에 이미 있는 행 → drop=True 면 합산에서 제외
+    → (파일별 반영 행 마스크 목록, 파일별 기여 보고서)
+    """
+    hashes = [row_fingerprints(f) for f in frames]
+    file_ids = np.repeat(np.arange(len(frames)), [len(h) for h in hashes])
+    codes, _ = pd.factorize(np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64))
+    # factorize 코드는 첫 등장 순서대로 0,1,2… → 지금까지 최대값보다 크면 첫 등장
+    prev_max = np.maximum.accumulate(np.concatenate(([-1], codes[:-1]))) if len(codes) else codes
+    is_first = codes > prev_max
+    first_file = file_ids[np.flatnonzero(is_first)][codes] if len(codes) else file_ids
+    cross = ~is_first & (first_file != file_ids)
+    within = ~is_first & (first_file == file_ids)
+
+    keeps, rows = [], []
+    offset = 0
+    for k, (name, f) in enumerate(zip(names, frames)):
+        sl = slice(offset, offset + len(f)); offset += len(f)
+        c, w = cross[sl], within[sl]
+        keep = ~c if drop else np.ones(len(f), dtype=bool)
+        keeps.append(keep)
+        hearts = heart_values(f["후원하트"]) if "후원하트" in f.columns else np.zeros(len(f), dtype=np.int64)
+        src = np.bincount(first_file[sl][c], minlength=len(frames)) if c.any() else None
+        rows.append({
+            "파일": name, "읽은 행": len(f), "파일 내 중복": int(w.sum()), "앞 파일과 겹침": int(c.sum()),
+            "겹친 파일": names[int(src.argmax())] if src is not None else "",
+            "반영 행": int(keep.sum()), "반영 하트": int(hearts[keep].sum()),
+            "상태": ("완전 중복 파일" if len(f) and c.all() else "일부 겹침" if c.any() else "정상"),
+        })
+    return keeps, pd.DataFrame(rows)
+
+
+def read_xlsx_streaming(src, sheet: str | int | None = 0, chunk_rows: int = 50_000) -> pd.DataFrame:
+    """
+    openpyxl read_only 모드로 행을 흘려 읽어 컬럼 리스트에 바로 쌓고, chunk_rows 행마다 컬럼 배열로 변환
+    (셀 객체/시트 전체를 메모리에 올리지 않음 → pd.read_excel 보다 빠르고 최대 메모리 작음)
+    - sheet: 이름/인덱스 → 그 시트만, ''/None → 첫 시트, ALL_SHEETS → 파일을 한 번 열어 모든 시트를
+      이어 붙이고 행마다 SHEET_COL(시트명)을 붙임. 시트마다 다른 컬럼은 합집합(없는 칸은 None)
+    - 첫 번째 비어 있지 않은 행 = 헤더, 완전히 빈 행은 건너뜀
+    """
+    from openpyxl import load_workbook  # 엑셀 읽을 때만 로드
+    if hasattr(src, "seek"):
+        src.seek(0)
+    wb = load_workbook(src, read_only=True, data_only=True)
+    try:
+        if sheet == ALL_SHEETS:
+            sheets = wb.worksheets
+        elif isinstance(sheet, int):
+            sheets = [wb.worksheets[sheet]]
+        elif sheet is not None and str(sheet).strip():
+            if str(sheet).strip() not in wb.sheetnames:
+                raise ValueError(f"시트 '{sheet}' 없음 (있는 시트: {', '.join(wb.sheetnames)})")
+            sheets = [wb[str(sheet).strip()]]
+        else:
+            sheets = [wb.worksheets[0]]
+
+        parts: list[pd.DataFrame] = []
+        header, names = None, []
+        intern = {}.setdefault   # 같은 문자열(BJ명/시간 등 반복값)은 객체 하나만 유지
+        for ws in sheets:
+            rows = ws.iter_rows(values_only=True)
+            header = next((r for r in rows if any(v is not None for v in r)), None)
+            if header is None:
+                continue
+            names, seen = [], {}
+            for j, h in enumerate(header):   # pandas와 같은 이름 규칙 (빈 헤더/중복 헤더)
+                nm = str(h).strip() if h is not None else f"Unnamed: {j}"
+                k = seen.get(nm, 0); seen[nm] = k + 1
+                names.append(nm if k == 0 else f"{nm}.{k}")
+            width = len(names)
+            cols = [[] for _ in names]
+
+            def flush():
+                # 파이썬 객체 리스트 → 컬럼 배열로 바로 변환해 최대 메모리를 청크 크기로 제한
+                if cols[0]:
+                    part = pd.DataFrame(dict(zip(names, cols)), columns=names)
+                    if sheet == ALL_SHEETS:
+                        part[SHEET_COL] = ws.title
+                    parts.append(part)
+                    for c in cols:
+                        c.clear()
+
+            for r in rows:
+                if len(r) < width:
+                    r = tuple(r) + (None,) * (width - len(r))
+                if all(v is None for v in r):
+                    continue
+                for j in range(width):
+                    v = r[j]
+                    if v.__class__ is str:
+                        v = intern(v, v)
+                    cols[j].append(v)
+                if len(cols[0]) >= chunk_rows:
+                    flush()
+            flush()
+    finally:
+        wb.close()
+
+    if not parts:   # 헤더만 있거나 빈 파일
+        return pd.DataFrame(columns=names if header is not None else [])
+    return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+
 # ===== 여기부터는 기존 app.py “내용”을 함수로 감쌈 =====
 def show():
     # ↓↓↓ 당신이 이전에 준 app.py 로직을 그대로 옮기되,
@@ -30,6 +295,7 @@ def show():
         return w
 
     def autosize_columns(wb, min_w=12, max_w=80, pad=2):
+        from openpyxl.utils import get_column_letter
         for ws in wb.worksheets:
             for col in ws.columns:
                 letter = get_column_letter(col[0].column)
@@ -39,26 +305,10 @@ def show():
                         max_width = max(max_width, visual_len(cell.value))
                 ws.column_dimensions[letter].width = max(min_w, min(max_width + pad, max_w))
 
-    def sanitize(name: str) -> str:
-        return re.sub(r'[\\/*?:\[\]]', "_", str(name))[:31] or "BJ"
-
-    def normalize_nick(nick: str) -> str:
-        if not isinstance(nick, str):
-            return ""
-        nick = re.sub(r'^\[.*?\]', '', nick)
-        nick = re.sub(r'\(.*?\)', '', nick)
-        return nick.strip()
-
-    def normalize_bj(name: str) -> str:
-        if not isinstance(name, str):
-            return ""
-        return re.sub(r'^\[.*?\]', '', name).strip()
-
-    @st.cache_data(show_spinner=False, persist=False, ttl=0, max_entries=10)
     def read_any_table(uploaded_file, sheet: str | int | None):
         name = (uploaded_file.name or "").lower()
         if name.endswith(".xlsx"):
-            return pd.read_excel(uploaded_file, sheet_name=(sheet if str(sheet).strip() else 0))
+            return read_xlsx_streaming(uploaded_file, sheet)
         raw = uploaded_file.read(); uploaded_file.seek(0)
         for enc in ["utf-8", "utf-8-sig", "cp949", "euc-kr"]:
             try:
@@ -68,37 +318,42 @@ def show():
                     sep = dialect.delimiter
                 except Exception:
                     sep = ","
-                return pd.read_csv(io.StringIO(text), sep=sep)
+                return pd.read_csv(io.StringIO(text), sep=sep, dtype=str)   # ID 앞자리 0 / '123' vs '123.0' 보존
             except Exception:
                 continue
         raise ValueError("CSV 인코딩/구분자 해석 실패")
 
+    @st.cache_data(show_spinner=False, persist=False, max_entries=10)
+    def load_donations(uploaded_file, sheet: str | int | None, by_sheet: bool = False) -> pd.DataFrame:
+        """업로드 1개 → 정규화 후원 표 (읽기+정규화 한 번, 재실행 시에는 캐시)"""
+        return normalize_donations(read_any_table(uploaded_file, sheet),
+                                   extract_date_from_name(uploaded_file.name), by_sheet)
+
+    @st.cache_data(show_spinner=False, persist=False, max_entries=10)
+    def find_overlaps(file_keys: tuple, names: tuple, drop: bool, _frames: list) -> tuple[list, pd.DataFrame]:
+        """detect_overlaps 를 (파일 ID, 시트 모드) 묶음 + 제외 여부별로 한 번만 (_frames 는 해시하지 않음)"""
+        return detect_overlaps(list(names), _frames, drop=drop)
+
+    @st.cache_data(show_spinner="여러 프로세스로 나눠 집계 중…", persist=False, max_entries=4)
+    def load_totals_parallel(uploaded_file) -> pd.DataFrame:
+        """큰 CSV 1개 → (참여BJ, ID, 닉네임) 합계 (preprocess 와 같은 결과, 바이트 구간별 워커 프로세스)"""
+        return aggregate_upload_parallel(uploaded_file.getbuffer())
+
     # ---------------- 단일 파일 (관리자용/BJ용 ZIP) ----------------
-    def preprocess(df: pd.DataFrame) -> pd.DataFrame:
-        df.columns = [str(c).strip() for c in df.columns]
-        col_bj    = next((c for c in df.columns if c == "참여BJ"), None)
-        col_heart = next((c for c in df.columns if c == "후원하트"), None)
-        col_mix   = next((c for c in df.columns if c == "후원 아이디(닉네임)"), None)
-        if not (col_bj and col_heart and col_mix):
-            raise ValueError("필수 컬럼 누락: 참여BJ / 후원하트 / 후원 아이디(닉네임)")
-
-        df[col_bj] = df[col_bj].astype(str).str.strip()
-        df[col_heart] = df[col_heart].astype(str).str.replace(",", "", regex=False)
-        df[col_heart] = pd.to_numeric(df[col_heart], errors="coerce").fillna(0).astype(int)
-        df[col_mix] = df[col_mix].astype(str).str.strip()
-
-        sp = df[col_mix].str.extract(r'^\s*(?P<ID>[^()]+?)(?:\((?P<NICK>.*)\))?\s*$')
-        df["ID"] = sp["ID"].fillna("").str.replace("＠","@",regex=False).str.strip()
-        df["닉네임"] = sp["NICK"].fillna("").apply(normalize_nick)
-
-        base = (
-            df.groupby([col_bj, "ID", "닉네임"], as_index=False)[col_heart]
-              .sum()
-              .rename(columns={col_bj:"참여BJ", col_heart:"후원하트"})
-        )
-        return base
+    def preprocess(table: pd.DataFrame) -> pd.DataFrame:
+        if not {"참여BJ", "후원하트"}.issubset(table.columns):
+            raise ValueError("필수 컬럼 누락: 참여BJ / 후원하트")
+        return sum_by_donor(table)
+
+    def handoff_button(table: pd.DataFrame, source: str, key: str):
+        """지금 보고서의 후원자를 쪽지 탭으로 (재업로드/재파싱 없이 ID별 합계만 넘김)"""
+        if st.button("✉️ 이 후원자들을 쪽지 탭 대상으로 보내기", key=key, use_container_width=True):
+            from dm_ui import hand_off_donations   # 누를 때만 (하트 합계 탭이 쪽지 탭 모듈에 묶이지 않게)
+            n = hand_off_donations(table, source)
+            st.success(f"후원자 {n:,}명을 쪽지 탭으로 넘겼습니다 — 쪽지 발송 탭에서 구간을 나눠 확인하세요.")
 
     def _xlsx_bytes_from_df(writer_fn) -> bytes:
+        from openpyxl import load_workbook  # 엑셀 만들 때만 로드
         bio = io.BytesIO()
         with pd.ExcelWriter(bio, engine="openpyxl") as w:
             writer_fn(w)
@@ -152,19 +407,24 @@ def show():
 
         return _xlsx_bytes_from_df(_write)
 
-    def build_file_sets(base: pd.DataFrame):
+    def build_file_sets(base: pd.DataFrame, fmt: str = "xlsx"):
         summary = base.groupby("참여BJ", as_index=False)["후원하트"].sum().sort_values("후원하트", ascending=False)
 
+        if fmt != "xlsx":
+            # 엑셀 블록과 같은 순서(BJ별 일반하트 → 제휴하트, 각 하트 내림차순), 구분은 행마다 표기
+            blk = base[["참여BJ", "ID", "닉네임", "후원하트"]].copy()
+            blk["구분"] = np.where(blk["ID"].str.contains("@", regex=False), "제휴하트", "일반하트")
+            blk = blk.sort_values(["참여BJ", "구분", "후원하트"], ascending=[True, True, False], kind="stable")
+            split = (blk.groupby(["참여BJ", "구분"])["후원하트"].sum().unstack(fill_value=0)
+                        .reindex(columns=["일반하트", "제휴하트"], fill_value=0))
+            admin_summary = summary.merge(split, left_on="참여BJ", right_index=True, how="left")
+            admin_files = columnar_files({"요약": admin_summary}, blk, "참여BJ", fmt)
+            bj_files = columnar_files({"요약": summary}, blk.drop(columns="구분"), "참여BJ", fmt)
+            return (admin_files, pack_zip(admin_files)), (bj_files, pack_zip(bj_files))
+
         def make_summary_bytes() -> bytes:
             return _xlsx_bytes_from_df(lambda w: summary.to_excel(w, sheet_name="요약", index=False))
 
-        def pack_zip(files: dict[str, bytes]) -> bytes:
-            zbio = io.BytesIO()
-            with zipfile.ZipFile(zbio, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for fname, data in files.items():
-                    zf.writestr(fname, data)
-            zbio.seek(0); return zbio.getvalue()
-
         admin_files, bj_files = {"요약.xlsx": make_summary_bytes()}, {"요약.xlsx": make_summary_bytes()}
         for bj in summary["참여BJ"]:
             sub = base[base["참여BJ"] == bj][["ID","닉네임","후원하트"]]
@@ -173,27 +433,16 @@ def show():
         return (admin_files, pack_zip(admin_files)), (bj_files, pack_zip(bj_files))
 
     # ---------------- 여러 파일 (총합산 엑셀) ----------------
-    def extract_date_from_name(name: str) -> str:
-        s = name.lower()
-        m = re.search(r'(20\d{2})[.\-_](\d{1,2})[.\-_](\d{1,2})', s)
-        if m: return f"{int(m[1]):04d}-{int(m[2]):02d}-{int(m[3]):02d}"
-        m = re.search(r'(20\d{2})(\d{2})(\d{2})', s)
-        if m: return f"{int(m[1]):04d}-{int(m[2]):02d}-{int(m[3]):02d}"
-        m = re.search(r'(\d{2})[.\-_](\d{1,2})[.\-_](\d{1,2})', s)
-        if m: return f"{2000+int(m[1]):04d}-{int(m[2]):02d}-{int(m[3]):02d}"
-        m = re.search(r'(\d{1,2})(\d{2})', s)
-        if m and len(m.group(0)) == 4:
-            y = datetime.now().year
-            return f"{y:04d}-{int(m[1]):02d}-{int(m[2]):02d}"
-        return datetime.now().strftime("%Y-%m-%d")
-
-    def build_master_excel_bytes(merged_df, df_daily, df_total) -> bytes:
+    def build_master_excel_bytes(merged_df, df_daily, df_total, df_hourly=None) -> bytes:
+        from openpyxl import load_workbook
         bio = io.BytesIO()
         with pd.ExcelWriter(bio, engine="openpyxl") as w:
             df_daily.to_excel(w, index=False, sheet_name="요약_일별")
             df_total.to_excel(w, index=False, sheet_name="요약_참여BJ_총계")
+            if df_hourly is not None and not df_hourly.empty:
+                df_hourly.to_excel(w, index=False, sheet_name="요약_시간대별")
             merged_df = merged_df.copy()
-            merged_df["참여BJ_정규화"] = merged_df["참여BJ"].apply(normalize_bj)
+            merged_df["참여BJ_정규화"] = normalize_bj_column(merged_df["참여BJ"])
             sort_cols = [c for c in ["날짜","후원시간"] if c in merged_df.columns]
             if sort_cols:
                 merged_df = merged_df.sort_values(sort_cols)
@@ -212,85 +461,225 @@ def show():
         out = io.BytesIO(); wb.save(out); out.seek(0)
         return out.getvalue()
 
+    def build_master_bundle_bytes(merged_df, df_daily, df_total, df_hourly, fmt: str) -> bytes:
+        """총합산 엑셀과 같은 요약/참여BJ별 블록을 CSV·Parquet ZIP 으로"""
+        summaries = {"요약_일별": df_daily, "요약_참여BJ_총계": df_total}
+        if df_hourly is not None and not df_hourly.empty:
+            summaries["요약_시간대별"] = df_hourly
+        cols = [c for c in ["날짜","후원시간","ID","닉네임","후원하트","구분"] if c in merged_df.columns]
+        blocks = merged_df[cols].assign(참여BJ=normalize_bj_column(merged_df["참여BJ"]))
+        sort_cols = [c for c in ["날짜","후원시간"] if c in blocks.columns]
+        if sort_cols:
+            blocks = blocks.sort_values(sort_cols, kind="stable")
+        return pack_zip(columnar_files(summaries, blocks, "참여BJ", fmt))
+
     # ================== UI ==================
-    uploaded = st.file_uploader("단일 CSV/XLSX 업로드 (관리자용/BJ용 ZIP 생성 — 합산)", type=["csv", "xlsx"])
-    sheet_name = st.text_input("시트 이름 (엑셀일 때만)", value="")
-
-    if uploaded:
-        try:
-            df_in = read_any_table(uploaded, sheet_name if uploaded.name.lower().endswith(".xlsx") else None)
-            base = preprocess(df_in)
-            (admin_files, admin_zip), (bj_files, bj_zip) = build_file_sets(base)
-            left, right = st.columns(2, gap="large")
-            with left:
-                st.subheader("관리자용 (합산, 구분/합계 포함)")
-                st.download_button("📦 관리자용 ZIP 다운로드", data=admin_zip,
-                                   file_name="BJ별_관리자용.zip", mime="application/zip",
-                                   use_container_width=True, key="zip-admin")
-            with right:
-                st.subheader("BJ용 (합산, 심플버전)")
-                st.download_button("📦 BJ용 ZIP 다운로드", data=bj_zip,
-                                   file_name="BJ별_BJ용.zip", mime="application/zip",
-                                   use_container_width=True, key="zip-bj")
-        except Exception as e:
-            st.error(f"오류: {e}")
-
-    st.header("여러 파일 합산 (총합산 엑셀 생성)")
-    multi = st.file_uploader("여러 CSV/XLSX 업로드", type=["csv","xlsx"], accept_multiple_files=True)
-
-    if multi:
-        all_rows = []
-        for uf in multi:
+    export_fmt = st.radio("내보내기 형식", list(EXPORT_FORMATS), format_func=EXPORT_FORMATS.get,
+                          horizontal=True, key="export-fmt")
+    profiling = st.checkbox("프로파일러 (켜 둔 동안 아래 집계 실행을 cProfile 로 측정)", value=False, key="prof-on")
+    prof = ProfileCapture(profiling)
+    artifacts = get_artifacts()
+    with prof:   # 꺼져 있으면 아무것도 하지 않음
+        uploaded = st.file_uploader("단일 CSV/XLSX 업로드 (관리자용/BJ용 ZIP 생성 — 합산)", type=["csv", "xlsx"])
+        sheet_name = st.text_input("시트 이름 (엑셀일 때만)", value="")
+        all_sheets = st.checkbox("엑셀의 모든 시트 한 번에 읽기 (여러 파일 합산에서는 시트 이름 = 날짜)", value=False)
+
+        if uploaded:
+            is_xlsx = uploaded.name.lower().endswith(".xlsx")
+            parallel = not is_xlsx and st.checkbox(
+                f"큰 CSV 병렬 집계 (줄 경계로 나눠 프로세스 {usable_workers()}개가 부분합 → 합침)",
+                value=parallel_by_default(uploaded.size), key="csv-parallel",
+                help="결과는 일반 집계와 같습니다. 따옴표 안에 줄바꿈이 있는 CSV 에는 쓰지 마세요. "
+                     "CPU 가 1개인 서버에서는 일반 집계보다 느립니다.")
             try:
-                date_str = extract_date_from_name(uf.name)
-                df_in = read_any_table(uf, None)
-                mix_col = "후원 아이디(닉네임)"
-                if mix_col not in df_in.columns:
-                    raise ValueError(f"{uf.name}: '{mix_col}' 컬럼이 없습니다.")
-                sp = df_in[mix_col].astype(str).str.extract(r'^\s*(?P<ID>[^()]+?)(?:\((?P<NICK>.*)\))?\s*$')
-                df_in["ID"] = sp["ID"].fillna("").str.replace("＠","@",regex=False).str.strip()
-                df_in["닉네임"] = sp["NICK"].fillna("").apply(normalize_nick)
-                df_in["구분"] = np.where(df_in["ID"].str.contains("@"), "제휴하트", "일반하트")
-                df_in["날짜"] = date_str
-                cols = ["날짜","후원시간","참여BJ","ID","닉네임","후원하트","구분"]
-                exist_cols = [c for c in cols if c in df_in.columns]
-                all_rows.append(df_in[exist_cols])
+                if parallel:   # 합계 표만 만듦 (쪽지 탭 인계도 이 합계로)
+                    table = base = load_totals_parallel(uploaded)
+                else:
+                    table = load_donations(uploaded, (ALL_SHEETS if all_sheets else sheet_name) if is_xlsx else None,
+                                           all_sheets and is_xlsx)
+                    base = preprocess(table)
+                # 산출물은 디스크 저장소에 한 번만 만들고, 재실행 때는 키만 넘김 (업로드가 바뀌면 file_id 도 바뀜)
+                recipe = recipe_key("single", uploaded.file_id, sheet_name, all_sheets, parallel, export_fmt)
+                zips = {}
+                def zip_set(which):
+                    if not zips:
+                        (_, zips["admin"]), (_, zips["bj"]) = build_file_sets(base, export_fmt)
+                    return zips[which]
+                admin_key = artifacts.memo(recipe + ":admin", lambda: zip_set("admin"))
+                bj_key = artifacts.memo(recipe + ":bj", lambda: zip_set("bj"))
+                left, right = st.columns(2, gap="large")
+                with left:
+                    st.subheader("관리자용 (합산, 구분/합계 포함)")
+                    st.download_button("📦 관리자용 ZIP 다운로드", data=artifacts.serve(admin_key),
+                                       file_name=f"BJ별_관리자용_{export_fmt}.zip", mime="application/zip",
+                                       use_container_width=True, key="zip-admin")
+                with right:
+                    st.subheader("BJ용 (합산, 심플버전)")
+                    st.download_button("📦 BJ용 ZIP 다운로드", data=artifacts.serve(bj_key),
+                                       file_name=f"BJ별_BJ용_{export_fmt}.zip", mime="application/zip",
+                                       use_container_width=True, key="zip-bj")
+                handoff_button(table, uploaded.name, key="handoff-single")
             except Exception as e:
-                st.warning(f"{uf.name} 처리 오류: {e}")
+                st.error(f"오류: {e}")
 
-        if all_rows:
-            merged = pd.concat(all_rows, ignore_index=True)
-            need_cols = {"날짜","참여BJ","구분","후원하트"}
-            if not need_cols.issubset(set(merged.columns)):
-                st.error("필수 컬럼(날짜/참여BJ/구분/후원하트) 부족으로 요약을 만들 수 없습니다.")
-            else:
-                piv = (merged.groupby(["날짜","참여BJ","구분"], as_index=False)["후원하트"].sum()
-                             .pivot(index=["날짜","참여BJ"], columns="구분", values="후원하트")
-                             .fillna(0).reset_index())
-                for col in ["일반하트","제휴하트"]:
-                    if col not in piv.columns: piv[col] = 0
-                piv["총합"] = piv["일반하트"] + piv["제휴하트"]
-                daily_out = piv[["날짜","참여BJ","일반하트","제휴하트","총합"]].sort_values(["날짜","참여BJ"]).reset_index(drop=True)
-                st.subheader("요약_일별"); st.dataframe(daily_out, use_container_width=True, hide_index=True)
-
-                merged["참여BJ_정규화"] = merged["참여BJ"].apply(normalize_bj)
-                total_by_bj = (merged.groupby(["참여BJ_정규화","구분"], as_index=False)["후원하트"].sum()
-                                      .pivot(index="참여BJ_정규화", columns="구분", values="후원하트")
-                                      .fillna(0).reset_index()
-                                      .rename(columns={"참여BJ_정규화":"참여BJ"}))
-                for col in ["일반하트","제휴하트"]:
-                    if col not in total_by_bj.columns: total_by_bj[col] = 0
-                total_by_bj["총합"] = total_by_bj["일반하트"] + total_by_bj["제휴하트"]
-                st.subheader("요약_참여BJ_총계 (정규화 적용)")
-                st.dataframe(total_by_bj.sort_values("총합", ascending=False), use_container_width=True, hide_index=True)
-
-                master_bytes = build_master_excel_bytes(
-                    merged_df=merged,
-                    df_daily=daily_out,
-                    df_total=total_by_bj[["참여BJ","일반하트","제휴하트","총합"]]
-                )
-                st.download_button("📥 총합산 엑셀 다운로드",
-                                   data=master_bytes,
-                                   file_name="총합산.xlsx",
+        st.header("여러 파일 합산 (총합산 엑셀 생성)")
+        multi = st.file_uploader("여러 CSV/XLSX 업로드", type=["csv","xlsx"], accept_multiple_files=True)
+
+        drop_dups = st.checkbox("앞 파일과 겹치는 행 제외 (날짜·후원시간·참여BJ·ID·후원하트가 같은 행)", value=False)
+
+        if "donor_index" not in st.session_state:   # 마지막 합산의 색인을 불러와 재시작 후에도 검색 가능
+            try:
+                st.session_state["donor_index"] = (DonorIndex.load(DONOR_INDEX_FILE) if DONOR_INDEX_FILE.exists()
+                                                   else DonorIndex())
+            except Exception:
+                st.session_state["donor_index"] = DonorIndex()
+        donors = st.session_state["donor_index"]
+
+        if multi:
+            loaded = []
+            for uf in multi:
+                try:
+                    by_sheet = all_sheets and uf.name.lower().endswith(".xlsx")
+                    loaded.append((uf, by_sheet, load_donations(uf, ALL_SHEETS if by_sheet else None, by_sheet)))
+                except Exception as e:
+                    st.warning(f"{uf.name} 처리 오류: {e}")
+
+            # 중복/겹침 판정 → 반영할 행만 남김
+            # 관계없는 위젯 변경으로 재실행될 때는 행 지문을 다시 계산하지 않음
+            keeps, overlap_report = find_overlaps(tuple((uf.file_id, by_sheet) for uf, by_sheet, _ in loaded),
+                                                  tuple(uf.name for uf, _, _ in loaded), drop_dups,
+                                                  [f for _, _, f in loaded])
+            all_rows = [f[keep] for (_, _, f), keep in zip(loaded, keeps)]
+            if len(overlap_report):
+                n_cross = int(overlap_report["앞 파일과 겹침"].sum())
+                if n_cross and not drop_dups:
+                    st.warning(f"앞 파일과 겹치는 행 {n_cross:,}개가 그대로 합산됩니다 (위 '겹치는 행 제외' 체크 시 제외).")
+                with st.expander("파일별 반영 행 / 중복 보고서", expanded=bool(n_cross)):
+                    st.dataframe(overlap_report, use_container_width=True, hide_index=True)
+
+            ver = donors.version
+            sources = []
+            for (uf, by_sheet, _), f in zip(loaded, all_rows):
+                if {"참여BJ", "후원하트"}.issubset(f.columns):   # 새 파일(또는 반영 행이 바뀐 파일)만 TOP-K 인덱스에 추가
+                    src = f"{uf.name}:{uf.size}:{'sheets' if by_sheet else 'first'}:{len(f)}"
+                    sources.append(src)
+                    if src not in donors.parts:
+                        donors.add(src, f[["날짜", "참여BJ", "ID", "닉네임", "후원하트"]]
+                                   .assign(참여BJ=normalize_bj_column(f["참여BJ"])))
+            donors.sync(sources)
+            if donors.version != ver:   # 합산 데이터가 바뀐 경우에만 디스크 저장
+                try:
+                    donors.save(DONOR_INDEX_FILE)
+                except Exception as e:
+                    st.warning(f"후원자 색인 저장 실패: {e}")
+
+            if all_rows:
+                merged = pd.concat(all_rows, ignore_index=True)
+                need_cols = {"날짜","참여BJ","구분","후원하트"}
+                if not need_cols.issubset(set(merged.columns)):
+                    st.error("필수 컬럼(날짜/참여BJ/구분/후원하트) 부족으로 요약을 만들 수 없습니다.")
+                else:
+                    piv = (merged.groupby(["날짜","참여BJ","구분"], as_index=False)["후원하트"].sum()
+                                 .pivot(index=["날짜","참여BJ"], columns="구분", values="후원하트")
+                                 .fillna(0).reset_index())
+                    for col in ["일반하트","제휴하트"]:
+                        if col not in piv.columns: piv[col] = 0
+                    piv["총합"] = piv["일반하트"] + piv["제휴하트"]
+                    daily_out = piv[["날짜","참여BJ","일반하트","제휴하트","총합"]].sort_values(["날짜","참여BJ"]).reset_index(drop=True)
+                    st.subheader("요약_일별"); st.dataframe(daily_out, use_container_width=True, hide_index=True)
+
+                    merged["참여BJ_정규화"] = normalize_bj_column(merged["참여BJ"])
+                    total_by_bj = (merged.groupby(["참여BJ_정규화","구분"], as_index=False)["후원하트"].sum()
+                                          .pivot(index="참여BJ_정규화", columns="구분", values="후원하트")
+                                          .fillna(0).reset_index()
+                                          .rename(columns={"참여BJ_정규화":"참여BJ"}))
+                    for col in ["일반하트","제휴하트"]:
+                        if col not in total_by_bj.columns: total_by_bj[col] = 0
+                    total_by_bj["총합"] = total_by_bj["일반하트"] + total_by_bj["제휴하트"]
+                    st.subheader("요약_참여BJ_총계 (정규화 적용)")
+                    st.dataframe(total_by_bj.sort_values("총합", ascending=False), use_container_width=True, hide_index=True)
+
+                    hourly = None
+                    if "후원시간" in merged.columns:
+                        st.subheader("요약_시간대별 (정규화 BJ × 날짜)")
+                        bin_label = st.radio("구간", ["1시간", "10분"], horizontal=True, key="hourly-bin")
+                        hourly, n_bad = hourly_histogram(merged, 60 if bin_label == "1시간" else 10)
+                        if n_bad:
+                            st.caption(f"후원시간 해석 불가 {n_bad:,}행은 시간대 분포에서 제외")
+                        pick = st.multiselect("참여BJ 필터", sorted(hourly["참여BJ"].unique()), key="hourly-bj")
+                        view = hourly[hourly["참여BJ"].isin(pick)] if pick else hourly
+                        st.dataframe(view, use_container_width=True, hide_index=True)
+
+                    recipe = recipe_key("master", [(uf.file_id, by_sheet) for uf, by_sheet, _ in loaded],
+                                        drop_dups, export_fmt, bin_label if hourly is not None else None)
+                    if export_fmt == "xlsx":
+                        master_key = artifacts.memo(recipe, lambda: build_master_excel_bytes(
+                            merged_df=merged,
+                            df_daily=daily_out,
+                            df_total=total_by_bj[["참여BJ","일반하트","제휴하트","총합"]],
+                            df_hourly=hourly,
+                        ))
+                        st.download_button("📥 총합산 엑셀 다운로드",
+                                           data=artifacts.serve(master_key),
+                                           file_name="총합산.xlsx",
+                                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                           use_container_width=True)
+                    else:
+                        master_key = artifacts.memo(recipe, lambda: build_master_bundle_bytes(
+                            merged, daily_out, total_by_bj[["참여BJ","일반하트","제휴하트","총합"]], hourly, export_fmt))
+                        st.download_button(f"📥 총합산 {export_fmt.upper()} 묶음 다운로드",
+                                           data=artifacts.serve(master_key),
+                                           file_name=f"총합산_{export_fmt}.zip",
+                                           mime="application/zip",
+                                           use_container_width=True)
+                    handoff_button(merged, f"총합산 {len(all_rows)}개 파일 ({daily_out['날짜'].min()} ~ {daily_out['날짜'].max()})",
+                                   key="handoff-multi")
+
+            if donors.parts:
+                st.subheader("후원자 TOP-K (정규화 BJ × 날짜 범위)")
+                dates = donors.dates()
+                c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+                with c1:
+                    pick_bj = st.multiselect("참여BJ (비우면 전체)", donors.bjs(), key="topk-bj")
+                with c2:
+                    d_from = st.selectbox("시작일", dates, index=0, key="topk-from")
+                with c3:
+                    d_to = st.selectbox("종료일", dates, index=len(dates) - 1, key="topk-to")
+                with c4:
+                    k = int(st.number_input("K", min_value=1, max_value=1000, value=20, step=5, key="topk-k"))
+                per_bj = st.checkbox("BJ별로 따로 순위", value=False, key="topk-per-bj")
+                board = donors.top_k(k, bjs=pick_bj or None, date_from=d_from, date_to=d_to, per_bj=per_bj)
+                st.dataframe(board, use_container_width=True, hide_index=True)
+                # 순위표는 작으므로 내용 해시가 곧 레시피 (세션마다 색인이 달라도 안전)
+                topk_key = artifacts.memo(
+                    recipe_key("topk", pd.util.hash_pandas_object(board, index=False).to_numpy().tobytes(),
+                               tuple(board.columns)),
+                    lambda: _xlsx_bytes_from_df(lambda w: board.to_excel(w, sheet_name="TOP-K", index=False)))
+                st.download_button("📥 TOP-K 엑셀 다운로드",
+                                   data=artifacts.serve(topk_key),
+                                   file_name=f"후원자_TOP{k}_{d_from}_{d_to}.xlsx",
                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                   use_container_width=True)
+                                   use_container_width=True, key="topk-dl")
+
+        if donors.parts:
+            st.subheader("후원자 검색 (ID/닉네임 앞부분)")
+            q = st.text_input("ID 또는 닉네임", value="", key="donor-q", placeholder="앞 글자만 입력해도 됩니다")
+            if q.strip():
+                t0 = time.perf_counter()
+                hits = donors.search(q)
+                st.caption(f"{len(hits)}명 일치 · {(time.perf_counter() - t0) * 1000:.1f} ms")
+                st.dataframe(hits, use_container_width=True, hide_index=True)
+                if len(hits):
+                    rid = st.selectbox("날짜·BJ별 내역", hits["ID"].tolist(), key="donor-pick")
+                    st.dataframe(donors.postings(rid), use_container_width=True, hide_index=True)
+
+    if prof.captured:
+        st.subheader("프로파일 결과 (누적시간 상위)")
+        top_n = int(st.number_input("상위 N", min_value=10, max_value=300, value=40, step=10, key="prof-top"))
+        st.dataframe(pd.DataFrame(prof.top(top_n)), use_container_width=True, hide_index=True)
+        # .prof 직렬화는 누를 때 측정 1회당 한 번만 (재실행마다 쓰지 않음)
+        st.download_button("📥 원본 프로파일(.prof) 다운로드",
+                           data=artifacts.serve_memo(f"profile:{prof.capture_id}", prof.raw_bytes),
+                           file_name=f"heart_profile_{datetime.now():%Y%m%d_%H%M%S}.prof",
+                           mime="application/octet-stream", key="prof-dl")
+        st.caption("`python -m pstats 파일.prof` 또는 snakeviz 로 열어 호출 관계까지 확인")
@@ -8,66 +8,43 @@ panda_dm_sender.py
     message.txt (기본 메시지, 여러 줄 가능)
 - 실행 예:
     python panda_dm_sender.py --headless --status-file send_status.json --reset
+    python panda_dm_sender.py --headless --offline --profile-dir chrome_profile
+      (--offline: 캐시된/지정한 chromedriver만 사용, 네트워크 조회 안 함
+       --profile-dir: 크롬 프로필 재사용 → 로그인 세션이 살아 있으면 로그인 생략)
+    python panda_dm_sender.py --base-url http://127.0.0.1:8765   (panda_mock_server.py 로컬 모사)
+- 발송 결과는 --index-db(SQLite)에 (캠페인ID, 후원아이디) 키로 기록 → 이미 성공한 ID는 재실행 시 자동 건너뜀
+  (--campaign 미지정 시 메시지 본문 해시, --reset은 해당 캠페인 기록 삭제)
+- 단계별 소요시간은 --trace-file(JSONL, 한 줄 = 한 span)에 기록:
+    {"ts": epoch초, "run": 실행ID, "idx": 순번, "id": 후원아이디, "step": 단계, "ms": 소요, "outcome": 결과}
+    step: driver / login / ensure_compose / fill / confirm / outcome / send / sleep / recipient
 """
 
-import os, sys, time, json, argparse
+import os, sys, csv, time, json, shutil, argparse
 from pathlib import Path
 from datetime import datetime
+from typing import TYPE_CHECKING
 
-import pandas as pd
 from dotenv import load_dotenv
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
+import random
 
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from delivery_index import DeliveryIndex, INDEX_DB, normalize_rid, campaign_for_message
+from sender_supervisor import emit_event
+from profile_capture import ProfileCapture, format_top
 
-import random
+if TYPE_CHECKING:   # 주석용 — 실제 selenium import 는 브라우저를 띄울 때만
+    from selenium.webdriver.support.ui import WebDriverWait
 
-LOGIN_URL = "https://www.pandalive.co.kr/my/post/received"
+BASE_URL = "https://www.pandalive.co.kr"
+LOGIN_PATH = "/my/post/received"
+LOGIN_URL = BASE_URL + LOGIN_PATH
+DRIVER_CACHE = Path(__file__).with_name(".chromedriver_path")  # 확인된 chromedriver 경로 캐시
 
 
 # ===================== 공통 유틸 =====================
 # ----- 전각 공백(U+3000) 사용 -----
 FULLWIDTH_SPACE = "\u3000"  # 한글 IME에서 'ㄱ + 한자 + 1'로 입력되는 전각 스페이스
-def get_visible_dialog_texts(driver, timeout=1.0):
-    """
-    role='dialog' 또는 공용 모달/토스트 컨테이너의 visible 텍스트를 수집
-    """
-    texts = []
-    xpaths = [
-        "//div[@role='dialog']",
-        "//*[contains(@class,'modal') or contains(@class,'dialog') or contains(@class,'Toastify__toast') or contains(@class,'toast')]",
-    ]
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        found = False
-        for xp in xpaths:
-            try:
-                elems = driver.find_elements(By.XPATH, xp)
-                for el in elems:
-                    try:
-                        s = el.text.strip()
-                        if s:
-                            texts.append(s)
-                            found = True
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-        if found:
-            break
-        time.sleep(0.1)
-    return texts
 
-def contains_any(s: str, needles):
-    s_norm = " ".join(s.split())  # 공백 정규화
-    return any(n in s_norm for n in needles)
 
 def now_ts() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -86,6 +63,90 @@ def save_status(path: Path, data: dict) -> None:
     path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
+# ----- 대상 CSV (pandas 없이 가볍게) -----
+def read_recipients(path: Path) -> list:
+    """
+    recipients_preview.csv → [{'후원아이디': str, '후원하트': int}, ...]
+    '후원아이디' 열이 없으면 None. 아이디는 문자열 그대로(앞자리 0 보존).
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        fields = [str(c).strip() for c in (reader.fieldnames or [])]
+        if "후원아이디" not in fields:
+            return None
+        reader.fieldnames = fields
+        rows = []
+        for r in reader:
+            try:
+                hearts = int(float(str(r.get("후원하트") or 0).replace(",", "")))
+            except ValueError:
+                hearts = 0
+            rows.append({"후원아이디": r.get("후원아이디") or "", "후원하트": hearts})
+    return rows
+
+
+# ----- 단계별 소요시간(span) 기록 -----
+class TraceLog:
+    """span을 JSONL로 한 줄씩 append (path가 비어 있으면 아무것도 안 함)"""
+
+    def __init__(self, path: str):
+        self.run = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.f = open(path, "a", encoding="utf-8", buffering=1) if path else None
+
+    def emit(self, step: str, ms: float, outcome: str = "", idx=None, rid: str = "") -> None:
+        if not self.f:
+            return
+        rec = {"ts": round(time.time(), 3), "run": self.run, "idx": idx, "id": rid,
+               "step": step, "ms": round(float(ms), 1), "outcome": outcome}
+        self.f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        if self.f:
+            self.f.close()
+            self.f = None
+
+
+def elapsed_ms(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000.0
+
+
+# ----- chromedriver 경로 결정 (캐시 우선) -----
+def resolve_driver_path(cache_file: Path = DRIVER_CACHE, offline: bool = False, explicit: str = "",
+                        refresh: bool = False) -> str:
+    """
+    chromedriver 경로를 정한다. 네트워크 조회는 마지막 수단.
+      1) --driver-path 로 지정한 파일
+      2) 캐시 파일에 기록된 경로(파일이 남아 있을 때, refresh=True 면 건너뜀)
+      3) offline이면 PATH의 chromedriver, 없으면 오류
+      4) webdriver_manager로 설치/조회 후 캐시에 기록
+    """
+    if explicit:
+        if not Path(explicit).exists():
+            raise RuntimeError(f"chromedriver 경로가 없습니다: {explicit}")
+        return explicit
+
+    try:
+        cached = cache_file.read_text(encoding="utf-8").strip()
+    except Exception:
+        cached = ""
+    if cached and Path(cached).exists() and not refresh:
+        return cached
+
+    if offline:
+        found = shutil.which("chromedriver")
+        if not found:
+            raise RuntimeError("오프라인 모드: 캐시/PATH에서 chromedriver를 찾지 못했습니다. --driver-path로 지정하세요.")
+        return found
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    try:
+        cache_file.write_text(path, encoding="utf-8")
+    except Exception:
+        pass
+    return path
+
+
 # ----- 5명마다 '줄 끝 스페이스' 규칙 -----
 def msg_with_line_end_spaces(base_message: str, send_index: int) -> str:
     """
@@ -110,8 +171,12 @@ def msg_with_line_end_spaces(base_message: str, send_index: int) -> str:
 
 
 # ===================== 셀레니움 유틸 =====================
-def short_wait_click(wait: WebDriverWait, xpath: str, timeout: float = 1.2) -> bool:
+# selenium 은 브라우저를 띄울 때만 필요 → 각 함수 안에서 import (--help / 사전 점검 실패 시 로드 비용 없음)
+def short_wait_click(wait: "WebDriverWait", xpath: str, timeout: float = 1.2) -> bool:
     """짧게 기다렸다가 클릭. 실패 시 False."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
     try:
         elem = WebDriverWait(wait._driver, timeout).until(
             EC.element_to_be_clickable((By.XPATH, xpath))
@@ -122,8 +187,11 @@ def short_wait_click(wait: WebDriverWait, xpath: str, timeout: float = 1.2) -> b
         return False
 
 
-def short_wait_present(wait: WebDriverWait, xpath: str, timeout: float = 1.2):
+def short_wait_present(wait: "WebDriverWait", xpath: str, timeout: float = 1.2):
     """짧은 대기 내 존재 확인. 없으면 None."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
     try:
         return WebDriverWait(wait._driver, timeout).until(
             EC.presence_of_element_located((By.XPATH, xpath))
@@ -132,7 +200,7 @@ def short_wait_present(wait: WebDriverWait, xpath: str, timeout: float = 1.2):
         return None
 
 
-def click_any_ok(wait: WebDriverWait, tries: int = 2, timeout_each: float = 1.0) -> None:
+def click_any_ok(wait: "WebDriverWait", tries: int = 2, timeout_each: float = 1.0) -> None:
     """
     페이지에 떠 있는 일반 '확인' 모달/다이얼로그를 최대 tries회 닫는다.
     (성공/실패 알림, 비밀번호 변경 알림 등 동일 텍스트 처리)
@@ -146,9 +214,14 @@ def click_any_ok(wait: WebDriverWait, tries: int = 2, timeout_each: float = 1.0)
         time.sleep(0.2)
 
 
-def login_and_open_compose(driver, wait, uid, pw):
+def login_and_open_compose(driver, wait, uid, pw, url: str = LOGIN_URL):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     # 1) 접속
-    driver.get(LOGIN_URL)
+    driver.get(url)
 
     # 2) 로그인 탭 클릭(회원가입이 기본일 수 있음)
     short_wait_click(wait, "//button[@role='tab']//p[normalize-space()='로그인']", timeout=3.0)
@@ -187,8 +260,24 @@ def login_and_open_compose(driver, wait, uid, pw):
     )
 
 
+def try_resume_session(driver, wait, url: str = LOGIN_URL) -> bool:
+    """프로필에 로그인 세션이 남아 있으면 로그인 없이 '쪽지쓰기' 모달을 연다. 실패 시 False."""
+    driver.get(url)
+    if not short_wait_present(wait, "//button[normalize-space()='쪽지쓰기']", timeout=4.0):
+        return False
+    click_any_ok(wait, tries=3, timeout_each=1.0)
+    try:
+        ensure_compose_open(driver, wait)
+        return True
+    except Exception:
+        return False
+
+
 def ensure_compose_open(driver, wait):
     """모달이 닫혔으면 다시 '쪽지쓰기'를 눌러 연다."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
     id_box = short_wait_present(wait, "//input[@placeholder='받는회원 ID']", timeout=0.6)
     msg_box = short_wait_present(wait, "//textarea[@placeholder='쪽지내용을 입력하세요.']", timeout=0.6)
     if id_box and msg_box:
@@ -202,69 +291,143 @@ def ensure_compose_open(driver, wait):
     )
 
 
-def send_one(wait: WebDriverWait, target_id: str, message: str) -> bool:
+# 서비스 문구에 맞춰 필요시 보강하세요
+SUCCESS_KEYS = ["전송되었습니다", "쪽지가 전송", "메시지가 전송", "성공적으로 전송", "완료"]
+FAIL_KEYS    = ["차단", "제한", "수신 거부", "쪽지를 받지", "보낼 수 없습니다", "권한이 없습니다"]
+
+# 페이지 안에서 한 번에: 받는회원 ID/본문 입력 → 보내기 → '전송하겠습니까?' 확인 →
+# MutationObserver로 성공/실패 알림이 뜰 때까지 대기 → 알림의 '확인' 닫기.
+# (보내기 전부터 떠 있던 토스트/다이얼로그는 스냅샷해 두고 판정에서 제외 — 직전 전송의 토스트 오판 방지)
+# 결과: {result: success|fail|timeout|no-compose|no-send, text, fill_ms, confirm_ms, outcome_ms}
+SEND_SCRIPT = r"""
+const [toId, message, okKeys, failKeys, timeoutMs] = arguments;
+const done = arguments[arguments.length - 1];
+const t0 = performance.now();
+let tFill = null, tSend = null, tConfirm = null;
+const norm = s => (s || "").replace(/\s+/g, " ").trim();
+const visible = el => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+const button = (root, label) =>
+  Array.from(root.querySelectorAll("button")).find(b => visible(b) && norm(b.textContent) === label);
+const setValue = (el, v) => {
+  // React 제어 컴포넌트도 값 변경을 인식하도록 네이티브 setter + input 이벤트
+  const proto = el.tagName === "TEXTAREA" ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+  Object.getOwnPropertyDescriptor(proto, "value").set.call(el, v);
+  el.dispatchEvent(new Event("input", {bubbles: true}));
+  el.dispatchEvent(new Event("change", {bubbles: true}));
+};
+
+const idBox = document.querySelector("input[placeholder='받는회원 ID']");
+const msgBox = document.querySelector("textarea[placeholder='쪽지내용을 입력하세요.']");
+if (!visible(idBox) || !visible(msgBox)) { done({result: "no-compose", text: ""}); return; }
+setValue(idBox, toId);
+setValue(msgBox, message);
+tFill = performance.now();
+const sendBtn = button(document, "보내기");
+if (!sendBtn) { done({result: "no-send", text: "", fill_ms: tFill - t0}); return; }
+
+const SEL = "[role='dialog'], [class*='modal'], [class*='dialog'], [class*='Toastify__toast'], [class*='toast']";
+// 보내기 전부터 보이던 알림/다이얼로그/확인 버튼(직전 전송의 토스트 등)은 판정·클릭하지 않는다.
+// 클릭 이후 새로 붙었거나 내용이 바뀐 상자만 fresh 에 모아 판정 (MutationObserver 레코드 기준)
+const stale = new WeakSet(Array.from(document.querySelectorAll(SEL)).filter(visible));
+const staleOk = new WeakSet(Array.from(document.querySelectorAll("button"))
+  .filter(b => visible(b) && norm(b.textContent) === "확인"));
+const fresh = new Set();
+const touch = (node, contentChanged) => {
+  const el = node.nodeType === 1 ? node : node.parentElement;
+  if (!el || !el.isConnected) return;
+  let boxes = [el, ...el.querySelectorAll(SEL)].filter(b => b.matches(SEL));
+  if (!boxes.length) boxes = [el.closest(SEL)].filter(Boolean);
+  // 이미 보이던 상자는 내용이 바뀐 경우만 (class/style 변경은 사라지는 애니메이션일 수 있음)
+  for (const b of boxes) if (contentChanged || !stale.has(b)) fresh.add(b);
+};
+const isOld = btn => {
+  const box = btn.closest(SEL);
+  return box ? (stale.has(box) && !fresh.has(box)) : staleOk.has(btn);
+};
+
+let confirmed = false, finished = false, timer = null, obs = null;
+const finish = (result, text) => {
+  if (finished) return;
+  finished = true;
+  if (obs) obs.disconnect();
+  clearTimeout(timer);
+  const tEnd = performance.now();
+  done({result: result, text: text, fill_ms: tFill - t0,
+        confirm_ms: tConfirm === null ? null : tConfirm - tSend,
+        outcome_ms: tEnd - (tConfirm === null ? tSend : tConfirm)});
+};
+const scan = () => {
+  if (finished) return;
+  for (const box of fresh) {
+    // 쪽지쓰기 모달 자체의 안내 문구(예: 글자수 제한)는 판정에서 제외
+    if (!box.isConnected || !visible(box) || box.contains(idBox)) continue;
+    const t = norm(box.innerText);
+    if (!t) continue;
+    const ok = button(box, "확인");
+    if (okKeys.some(k => t.includes(k))) { if (ok) ok.click(); finish("success", t); return; }
+    if (failKeys.some(k => t.includes(k))) { if (ok) ok.click(); finish("fail", t); return; }
+  }
+  if (!confirmed) {
+    const ok = Array.from(document.querySelectorAll("button"))
+      .find(b => visible(b) && norm(b.textContent) === "확인" && !isOld(b));
+    if (ok) { confirmed = true; tConfirm = performance.now(); ok.click(); }
+  }
+};
+obs = new MutationObserver(records => {
+  for (const r of records) {
+    if (r.type === "childList") r.addedNodes.forEach(n => touch(n, true));
+    else touch(r.target, r.type === "characterData");
+  }
+  scan();
+});
+obs.observe(document.body, {childList: true, subtree: true, characterData: true,
+                            attributes: true, attributeFilter: ["class", "style"]});
+timer = setTimeout(() => finish("timeout", ""), timeoutMs);
+tSend = performance.now();
+sendBtn.click();
+scan();
+"""
+
+
+def send_one(wait: "WebDriverWait", target_id: str, message: str, outcome_timeout: float = 4.0,
+             spans: dict | None = None) -> bool:
     """
-    1명 전송: 받는회원 ID, 본문, 보내기, 전송확인->확인,
-    알림 텍스트로 성공/실패 판독 후 '확인' 닫고 결과 반환.
+    1명 전송: 입력/보내기/전송확인/결과 판독을 SEND_SCRIPT 한 번(라운드트립 1회)으로 처리.
+    모달이 닫혀 있으면 한 번만 다시 열고 재시도. 판정이 없으면 보수적으로 실패 처리.
+    spans(dict)를 주면 단계별 ms(ensure_compose/send/fill/confirm/outcome)를 채워 준다.
     """
     driver = wait._driver
-    ensure_compose_open(driver, wait)
-
-    # 받는회원 ID
-    to_box = short_wait_present(wait, "//input[@placeholder='받는회원 ID']", timeout=1.5)
-    if not to_box:
-        return False
-    to_box.send_keys(Keys.CONTROL, "a"); to_box.send_keys(Keys.DELETE); to_box.send_keys(target_id)
-
-    # 본문
-    msg_box = short_wait_present(wait, "//textarea[@placeholder='쪽지내용을 입력하세요.']", timeout=1.2)
-    if not msg_box:
-        return False
-    msg_box.send_keys(Keys.CONTROL, "a"); msg_box.send_keys(Keys.DELETE); msg_box.send_keys(message)
-
-    # 보내기
-    if not short_wait_click(wait, "//button[normalize-space()='보내기']", timeout=1.5):
-        ensure_compose_open(driver, wait)
-        if not short_wait_click(wait, "//button[normalize-space()='보내기']", timeout=1.5):
-            return False
-
-    # '전송하겠습니까?' 확인
-    short_wait_click(wait, "//button[normalize-space()='확인']", timeout=1.5)
-
-    # 알림 렌더되는 동안 아주 짧게 대기
-    time.sleep(0.3)
-
-    # 서비스 문구에 맞춰 필요시 보강하세요
-    SUCCESS_KEYS = ["전송되었습니다", "쪽지가 전송", "메시지가 전송", "성공적으로 전송","완료"]
-    FAIL_KEYS    = ["차단", "제한", "수신 거부", "쪽지를 받지", "보낼 수 없습니다", "권한이 없습니다"]
-
-    # 모달/토스트 텍스트 수집 후 판별
-    ok = None
-    texts = get_visible_dialog_texts(driver, timeout=1.0)
-
-    # 성공 우선
-    for t in texts:
-        if contains_any(t, SUCCESS_KEYS):
-            ok = True
-            break
-
-    # 실패(제한/차단 등)
-    if ok is None:
-        for t in texts:
-            if contains_any(t, FAIL_KEYS):
-                ok = False
-                break
-
-    # 남아있는 '확인' 모달/토스트 닫기
-    click_any_ok(wait, tries=2, timeout_each=0.6)
+    spans = spans if spans is not None else {}
+    result = None
+    for attempt in range(2):
+        t0 = time.perf_counter()
+        try:
+            res = driver.execute_async_script(
+                SEND_SCRIPT, target_id, message, SUCCESS_KEYS, FAIL_KEYS, int(outcome_timeout * 1000)
+            ) or {}
+            result = res.get("result")
+            for k in ("fill", "confirm", "outcome"):
+                if res.get(f"{k}_ms") is not None:
+                    spans[k] = float(res[f"{k}_ms"])
+        except Exception:
+            result = None
+        spans["send"] = spans.get("send", 0.0) + elapsed_ms(t0)
+        if result in ("no-compose", "no-send") and attempt == 0:
+            t0 = time.perf_counter()
+            try:
+                ensure_compose_open(driver, wait)
+            except Exception:
+                return False
+            finally:
+                spans["ensure_compose"] = elapsed_ms(t0)
+            continue
+        break
 
-    # 판정이 여전히 없으면 보수적으로 실패 처리
-    if ok is None:
-        ok = False
+    # 판정 못 했으면 남아있는 '확인' 모달/토스트 닫기
+    if result not in ("success", "fail"):
+        click_any_ok(wait, tries=2, timeout_each=0.6)
 
-    # 다음 대상 대비 모달 열림 유지
-    ensure_compose_open(driver, wait)
-    return ok
+    return result == "success"
 
 # ===================== 메인 =====================
 def main():
@@ -274,40 +437,59 @@ def main():
     ap.add_argument("--reset", action="store_true")
     ap.add_argument("--start", type=int, default=0)   # 시작 인덱스 (0-base)
     ap.add_argument("--limit", type=int, default=0)   # 최대 전송 수 (0=전체)
+    ap.add_argument("--driver-path", type=str, default="")   # chromedriver 직접 지정
+    ap.add_argument("--offline", action="store_true")        # webdriver_manager 네트워크 조회 금지
+    ap.add_argument("--profile-dir", type=str, default="")   # 크롬 user-data-dir (로그인 세션 재사용)
+    ap.add_argument("--trace-file", type=str, default=str(Path(__file__).with_name("send_trace.jsonl")))
+    ap.add_argument("--base-url", type=str, default=BASE_URL)  # 예: 로컬 모사 서버 http://127.0.0.1:8765
+    ap.add_argument("--recipients", type=str, default="")     # 기본: recipients_preview.csv
+    ap.add_argument("--message-file", type=str, default="")   # 기본: message.txt
+    ap.add_argument("--index-db", type=str, default=str(INDEX_DB))  # ID별 발송결과 인덱스(SQLite)
+    ap.add_argument("--campaign", type=str, default="")  # 캠페인ID (비우면 메시지 본문 해시)
+    ap.add_argument("--profile-out", type=str, default="")  # 지정 시 로그인~전송 배치를 cProfile로 측정해 .prof 저장
     args = ap.parse_args()
+    t_start = time.perf_counter()
 
     base = Path(__file__).parent
-    recipients_csv = base / "recipients_preview.csv"
-    message_txt     = base / "message.txt"
+    recipients_csv = Path(args.recipients) if args.recipients else base / "recipients_preview.csv"
+    message_txt     = Path(args.message_file) if args.message_file else base / "message.txt"
+    login_url       = args.base_url.rstrip("/") + LOGIN_PATH
     env_file        = base / ".env"
     status_path     = Path(args.status_file)
 
     if not recipients_csv.exists():
-        print("recipients_preview.csv 없음"); sys.exit(1)
+        print(f"{recipients_csv.name} 없음"); sys.exit(1)
     if not message_txt.exists():
-        print("message.txt 없음"); sys.exit(1)
+        print(f"{message_txt.name} 없음"); sys.exit(1)
 
-    df = pd.read_csv(recipients_csv)
-    if "후원아이디" not in df.columns:
+    rows = read_recipients(recipients_csv)
+    if rows is None:
         print("CSV에 '후원아이디' 열 없음"); sys.exit(1)
 
     base_message = Path(message_txt).read_text(encoding="utf-8")
 
-    # 상태파일 초기화/로드
-    st = load_status(status_path)
-    need_reinit = args.reset or (not st.get("items")) or (len(st.get("items", [])) != len(df))
-    if need_reinit:
-        st = {"items": [], "meta": {"created": now_ts()}}
-        for i, row in df.iterrows():
-            st["items"].append({
-                "index": int(i),
-                "id": str(row["후원아이디"]),
-                "hearts": int(row.get("후원하트", 0)) if "후원하트" in df.columns else 0,
-                "status": "pending",
-                "updated": now_ts()
-            })
-        save_status(status_path, st)
-        print(f"[init] status 초기화: {len(st['items'])}건")
+    # 발송 결과 인덱스: (캠페인, 후원아이디) 키 — 행 순서/개수와 무관
+    campaign = args.campaign or campaign_for_message(base_message)
+    index = DeliveryIndex(Path(args.index_db), campaign)
+    if args.reset:
+        index.reset()
+        print(f"[init] 캠페인 {campaign} 기록 초기화")
+
+    # 상태파일(대시보드용 현재 목록 뷰)은 매 실행마다 CSV + 인덱스로 다시 만든다
+    st = {"items": [], "meta": {"created": now_ts(), "campaign": campaign, "index_db": str(args.index_db)}}
+    for i, row in enumerate(rows):
+        rid = normalize_rid(row["후원아이디"])
+        st["items"].append({
+            "index": i,
+            "id": rid,
+            "hearts": row["후원하트"],
+            "status": index.get(rid),
+            "updated": now_ts()
+        })
+    save_status(status_path, st)
+    done_cnt = index.counts(it["id"] for it in st["items"])["success"]
+    print(f"[init] 대상 {len(st['items'])}건 (캠페인 {campaign}, 이미 성공 {done_cnt}건은 건너뜀)")
+    emit_event("start", total=len(rows), campaign=campaign, already_done=done_cnt)
 
     # 로그인 정보
     load_dotenv(env_file)
@@ -316,7 +498,13 @@ def main():
     if not uid or not pw:
         print(".env에 PANDA_ID/PANDA_PW 필요"); sys.exit(1)
 
-    # 브라우저 옵션
+    # 브라우저 옵션 (selenium 은 사전 점검을 다 통과한 뒤에만 로드)
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import SessionNotCreatedException
+
     opts = Options()
     if args.headless:
         opts.add_argument("--headless=new")
@@ -333,35 +521,78 @@ def main():
     opts.add_argument("--disable-features=PasswordLeakDetection,PasswordCheck,PasswordManagerOnboarding,NotificationTriggers,PushMessaging,PermissionPromptFilter")
     opts.add_argument("--disable-notifications")
     opts.add_argument("--disable-popup-blocking")
+    if args.profile_dir:
+        opts.add_argument(f"--user-data-dir={Path(args.profile_dir).resolve()}")
 
-    driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=opts)
+    try:
+        driver_path = resolve_driver_path(offline=args.offline, explicit=args.driver_path)
+    except Exception as e:
+        print(f"chromedriver 준비 실패: {e}"); sys.exit(1)
+    trace = TraceLog(args.trace_file)
+    try:
+        driver = webdriver.Chrome(service=ChromeService(driver_path), options=opts)
+    except SessionNotCreatedException as e:
+        # 크롬이 업데이트돼 캐시된 chromedriver 버전이 안 맞는 경우 → 다시 조회해 캐시를 갱신하고 한 번 더
+        if args.offline or args.driver_path:
+            print(f"브라우저 시작 실패(chromedriver 버전 확인): {e.msg}"); sys.exit(1)
+        print(f"[driver] 세션 생성 실패 → chromedriver 다시 조회: {e.msg}")
+        try:
+            driver_path = resolve_driver_path(refresh=True)
+        except Exception as e2:
+            print(f"chromedriver 준비 실패: {e2}"); sys.exit(1)
+        driver = webdriver.Chrome(service=ChromeService(driver_path), options=opts)
     wait = WebDriverWait(driver, 8)
+    trace.emit("driver", elapsed_ms(t_start))
+    print(f"[timing] 브라우저 준비 {time.perf_counter() - t_start:.1f}s")
 
+    prof = ProfileCapture(bool(args.profile_out))
+    prof.start()
     try:
-        # 로그인 + '쪽지쓰기' 모달 열기
-        login_and_open_compose(driver, wait, uid, pw)
-
-        success, fail, sent = 0, 0, 0
-        for i, row in df.iterrows():
+        # 로그인 + '쪽지쓰기' 모달 열기 (프로필 세션이 살아 있으면 로그인 생략)
+        t0 = time.perf_counter()
+        if args.profile_dir and try_resume_session(driver, wait, login_url):
+            print("[login] 기존 세션 재사용")
+            trace.emit("login", elapsed_ms(t0), "resumed")
+        else:
+            login_and_open_compose(driver, wait, uid, pw, login_url)
+            trace.emit("login", elapsed_ms(t0), "login")
+        print(f"[timing] 로그인/모달 준비 {time.perf_counter() - t_start:.1f}s")
+
+        success, fail, sent, skipped = 0, 0, 0, 0
+        for i, row in enumerate(rows):
             # 범위 제어
             if args.start and i < args.start:
                 continue
             if args.limit and sent >= args.limit:
                 break
 
-            tid = str(row["후원아이디"]).strip()
+            tid = normalize_rid(row["후원아이디"])
             if not tid:
                 st["items"][i]["status"]  = "fail"
                 st["items"][i]["updated"] = now_ts()
                 save_status(status_path, st)
                 continue
 
+            # 이미 성공한 ID(이전 실행/중복 행)는 건너뜀
+            if index.is_done(tid):
+                st["items"][i]["status"] = "success"
+                skipped += 1
+                continue
+
             # 5명마다 '줄 끝 스페이스' 적용
             message = msg_with_line_end_spaces(base_message, sent)
 
-            ok = send_one(wait, tid, message)
-
-            st["items"][i]["status"]  = "success" if ok else "fail"
+            t_rcpt = time.perf_counter()
+            spans = {}
+            ok = send_one(wait, tid, message, spans=spans)
+            outcome = "success" if ok else "fail"
+            for step, ms in spans.items():
+                trace.emit(step, ms, outcome, idx=int(i), rid=tid)
+            if sent == 0:
+                print(f"[timing] 첫 전송까지 {time.perf_counter() - t_start:.1f}s")
+
+            index.mark(tid, outcome, st["items"][i]["hearts"])
+            st["items"][i]["status"]  = outcome
             st["items"][i]["updated"] = now_ts()
             save_status(status_path, st)
 
@@ -370,15 +601,27 @@ def main():
             else:
                 fail += 1
             sent += 1
+            emit_event("progress", idx=int(i), id=tid, outcome=outcome,
+                       sent=sent, success=success, fail=fail, skipped=skipped)
 
             # 사람이 직접 보내는 것처럼 0.2~2초 랜덤 대기
             delay = random.uniform(0.2, 2)  # 0.2초 ~ 2초 사이 부동소수
             time.sleep(delay)
+            trace.emit("sleep", delay * 1000.0, idx=int(i), rid=tid)
+            trace.emit("recipient", elapsed_ms(t_rcpt), outcome, idx=int(i), rid=tid)
 
-        print(f"[done] 성공 {success} / 실패 {fail}")
+        print(f"[done] 성공 {success} / 실패 {fail} / 건너뜀(기존 성공) {skipped}")
+        emit_event("done", sent=sent, success=success, fail=fail, skipped=skipped)
         sys.exit(0)
 
     finally:
+        prof.stop()
+        if prof.captured:
+            prof.dump(args.profile_out)
+            print(f"[profile] {args.profile_out} 저장 (누적시간 상위 20)")
+            print(format_top(prof.top(20)))
+        trace.close()
+        index.close()
         try:
             driver.quit()
         except Exception:
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+panda_mock_server.py
+- PandaLive 쪽지 발송 흐름의 로컬 모사 서버 (panda_dm_sender 오프라인 테스트/벤치마크용)
+- mock_site/index.html + 작은 JSON API:
+    GET  /my/post/received   쪽지함 페이지(로그인 탭 / 쪽지쓰기 모달 / 전송확인 / 알림)
+    GET  /api/config         페이지 동작 설정
+    GET  /api/me             로그인 세션 확인(쿠키)
+    POST /api/login          로그인(아이디/비번이 비어 있지 않으면 성공)
+    POST /api/send           전송 → 결과 알림 종류/문구/지연
+    GET  /api/log            서버가 실제로 처리한 전송 목록(정답지)
+    POST /api/reset          로그 초기화
+- 받는회원 ID 접두어로 결과를 정한다:
+    fail*   → 실패 알림창 ("쪽지를 받지 않는 회원입니다.")
+    block*  → 실패 토스트 ("차단된 회원에게는 보낼 수 없습니다.")
+    slow*   → --slow-ms 만큼 늦게 성공 토스트
+    silent* → 전송은 되지만 알림 없음 (판독 불가 케이스)
+    그 외    → 성공 토스트 (--fail-rate 확률로 실패)
+- 실행 예:
+    python panda_mock_server.py --port 8765 --notice
+    python panda_dm_sender.py --base-url http://127.0.0.1:8765 --recipients r.csv --message-file m.txt
+"""
+
+import json, random, argparse, threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SITE_DIR = Path(__file__).with_name("mock_site")
+
+SUCCESS_MSG = "쪽지가 전송되었습니다."
+FAIL_DIALOG_MSG = "쪽지를 받지 않는 회원입니다."
+FAIL_TOAST_MSG = "차단된 회원에게는 보낼 수 없습니다."
+
+
+def decide_outcome(to_id: str, cfg: dict) -> dict:
+    """받는회원 ID → {delivered, display(toast|dialog|none), message, delay_ms}"""
+    tid = to_id.lower()
+    if tid.startswith("fail"):
+        return {"delivered": False, "display": "dialog", "message": FAIL_DIALOG_MSG, "delay_ms": 0}
+    if tid.startswith("block"):
+        return {"delivered": False, "display": "toast", "message": FAIL_TOAST_MSG, "delay_ms": 0}
+    if tid.startswith("silent"):
+        return {"delivered": True, "display": "none", "message": "", "delay_ms": 0}
+    delay = int(cfg["slow_ms"]) if tid.startswith("slow") else 0
+    if cfg["fail_rate"] and random.random() < cfg["fail_rate"]:
+        return {"delivered": False, "display": "toast", "message": FAIL_TOAST_MSG, "delay_ms": delay}
+    return {"delivered": True, "display": cfg["success_display"], "message": SUCCESS_MSG, "delay_ms": delay}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    server_version = "PandaMock/1.0"
+
+    # ----- 응답 유틸 -----
+    def _send(self, code: int, body: bytes, ctype: str, headers: dict | None = None):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, code: int, data, headers: dict | None = None):
+        self._send(code, json.dumps(data, ensure_ascii=False).encode("utf-8"),
+                   "application/json; charset=utf-8", headers)
+
+    def _body(self) -> dict:
+        n = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(n).decode("utf-8") or "{}")
+        except Exception:
+            return {}
+
+    def _logged_in(self) -> bool:
+        return "mock_sess=1" in (self.headers.get("Cookie") or "")
+
+    def log_message(self, fmt, *args):
+        if self.server.cfg.get("verbose"):
+            super().log_message(fmt, *args)
+
+    # ----- 라우팅 -----
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        cfg = self.server.cfg
+        if path in ("/", "/my/post/received"):
+            self._send(200, (SITE_DIR / "index.html").read_bytes(), "text/html; charset=utf-8")
+        elif path == "/api/config":
+            self._json(200, {"notice": cfg["notice"], "close_after_send": cfg["close_after_send"],
+                             "toast_ms": cfg["toast_ms"]})
+        elif path == "/api/me":
+            self._json(200 if self._logged_in() else 401, {})
+        elif path == "/api/log":
+            with self.server.lock:
+                self._json(200, list(self.server.sent))
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        data = self._body()
+        if path == "/api/login":
+            if str(data.get("id", "")).strip() and str(data.get("pw", "")).strip():
+                self._json(200, {}, {"Set-Cookie": "mock_sess=1; Path=/; Max-Age=86400"})
+            else:
+                self._json(401, {})
+        elif path == "/api/send":
+            if not self._logged_in():
+                self._json(401, {"error": "login required"}); return
+            to_id = str(data.get("to", "")).strip()
+            res = decide_outcome(to_id, self.server.cfg)
+            with self.server.lock:
+                self.server.sent.append({"id": to_id, "delivered": res["delivered"], "display": res["display"],
+                                         "chars": len(str(data.get("text", "")))})
+            self._json(200, res)
+        elif path == "/api/reset":
+            with self.server.lock:
+                self.server.sent.clear()
+            self._json(200, {})
+        else:
+            self._json(404, {"error": "not found"})
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, **cfg) -> ThreadingHTTPServer:
+    """설정값을 가진 서버 생성 (serve_forever는 호출 측에서). port=0이면 빈 포트 자동 선택."""
+    srv = ThreadingHTTPServer((host, port), MockHandler)
+    srv.cfg = {
+        "notice": False, "close_after_send": False, "toast_ms": 2500,
+        "slow_ms": 2500, "fail_rate": 0.0, "success_display": "toast", "verbose": False,
+    }
+    srv.cfg.update(cfg)
+    srv.sent = []
+    srv.lock = threading.Lock()
+    return srv
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", type=str, default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--notice", action="store_true")             # 로그인 직후 '확인' 안내 모달
+    ap.add_argument("--close-after-send", action="store_true")   # 성공 후 쪽지쓰기 모달 닫기
+    ap.add_argument("--slow-ms", type=int, default=2500)         # slow* 수신자 알림 지연
+    ap.add_argument("--toast-ms", type=int, default=2500)        # 토스트 표시 시간
+    ap.add_argument("--fail-rate", type=float, default=0.0)      # 일반 수신자 무작위 실패 확률
+    ap.add_argument("--success-display", choices=["toast", "dialog"], default="toast")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    srv = make_server(args.host, args.port, notice=args.notice, close_after_send=args.close_after_send,
+                      slow_ms=args.slow_ms, toast_ms=args.toast_ms, fail_rate=args.fail_rate,
+                      success_display=args.success_display, verbose=args.verbose)
+    print(f"[mock] http://{args.host}:{srv.server_address[1]}/my/post/received")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
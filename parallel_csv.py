@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+parallel_csv.py
+- 아주 큰 CSV 한 개를 줄 경계에 맞춘 바이트 구간으로 나눠 워커 프로세스들이 (참여BJ, ID, 닉네임)별 하트 부분합을 만들고
+  부모가 합친다 (map: 구간 파싱 + 정규화 + 부분합 / reduce: 부분합 concat → 같은 groupby 한 번)
+- 워커에는 (파일 경로, 시작, 끝) 숫자만 넘기고 각자 파일을 mmap 해서 자기 구간만 읽음 → 데이터를 pickle 로 복사해 보내지 않음
+- 결과는 직렬 경로(read_any_table → donations.normalize_donations → sum_by_donor, 즉 단일 파일 preprocess)와 동일
+    인코딩/구분자도 직렬과 같은 규칙: utf-8 로 전체가 읽히면 utf-8, 아니면 cp949 / 앞 4000자로 구분자 추정
+- 제약: 따옴표 안에 줄바꿈이 든 CSV 는 줄 경계로 자를 수 없음 (이벤트 내보내기 파일은 한 줄 = 한 행)
+"""
+
+import io, os, csv, mmap, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+
+from donations import MIX_COL, normalize_donations, sum_by_donor   # Streamlit 없음 → spawn 워커 기동이 가벼움
+
+PARALLEL_MIN_BYTES = 64 * 2**20     # 이보다 작은 파일은 프로세스 띄우는 비용이 더 큼 (UI 기본값 기준)
+ENCODINGS = ("utf-8", "cp949")      # read_any_table 의 시도 순서에서 실제로 갈리는 두 가지
+USE_COLS = {"참여BJ", "후원하트", MIX_COL}
+SPLITS_PER_WORKER = 4               # 구간을 워커 수보다 잘게 → 늦게 끝나는 워커 없이 고르게
+
+
+def usable_workers(workers: int | None = None) -> int:
+    """요청 워커 수 → 1 ~ CPU 수 (CPU 보다 많이 띄우면 기동·전달 비용만 늘어남)"""
+    cpus = os.cpu_count() or 1
+    return max(1, min(workers or cpus, cpus))
+
+
+def parallel_by_default(size: int) -> bool:
+    """UI 기본값: CPU 가 2개 이상이고 파일이 충분히 클 때만 (1 CPU 에서는 직렬보다 느림 — bench_parallel_csv)"""
+    return (os.cpu_count() or 1) > 1 and size >= PARALLEL_MIN_BYTES
+
+
+def line_ranges(mm, start: int, parts: int) -> list[tuple[int, int]]:
+    """[start, 파일 끝)을 parts 개 근처로 자르되 경계는 항상 줄바꿈 다음 바이트"""
+    size = len(mm)
+    step = max(1, (size - start) // max(parts, 1))
+    bounds = [start]
+    for k in range(1, parts):
+        pos = mm.find(b"\n", max(bounds[-1], start + k * step))
+        if pos < 0:
+            break
+        bounds.append(pos + 1)
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def sniff_sep(head: bytes, enc: str) -> str | None:
+    """앞부분 → 구분자 (read_any_table 과 같은 Sniffer 규칙), 이 인코딩으로 안 읽히면 None"""
+    import codecs
+    try:
+        text = codecs.getincrementaldecoder(enc)().decode(head, final=False)
+    except UnicodeDecodeError:
+        return None
+    try:
+        return csv.Sniffer().sniff(text[:4000], delimiters=[",", "\t", ";", "|"]).delimiter
+    except Exception:
+        return ","
+
+
+def _map_range(path: str, header_end: int, start: int, end: int, enc: str, sep: str):
+    """워커: 헤더 + 자기 구간만 mmap 에서 읽어 정규화 → 부분합. 이 인코딩으로 안 읽히면 None"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        try:
+            text = mm[:header_end].decode(enc) + mm[start:end].decode(enc)
+        except UnicodeDecodeError:
+            return None
+    # dtype=str: 구간마다 따로 하는 타입 추론이 갈리지 않게 (숫자 ID만 있는 구간 + 빈칸 → float → '10140.0' 방지)
+    df = pd.read_csv(io.StringIO(text), sep=sep, dtype=str, usecols=lambda c: str(c).strip() in USE_COLS)
+    return sum_by_donor(normalize_donations(df, ""))
+
+
+def aggregate_csv_parallel(path, workers: int | None = None) -> pd.DataFrame:
+    """
+    CSV 파일 경로 → (참여BJ, ID, 닉네임, 후원하트) 합계 표
+    - workers: 프로세스 수 (기본·최대 CPU 수). spawn 으로 띄움 — 스레드가 도는 서버 프로세스를 fork 하지 않고 Windows 와도 동일
+    - 앞 인코딩으로 어느 구간이라도 안 읽히면 다음 인코딩으로 전체 재시도 (직렬 경로와 같은 판정)
+    """
+    path = str(path)
+    workers = usable_workers(workers)
+    if os.path.getsize(path) == 0:
+        raise ValueError("빈 CSV 파일입니다.")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_end = mm.find(b"\n") + 1 or len(mm)
+        head = mm[:64 * 1024]
+        ranges = line_ranges(mm, header_end, workers * SPLITS_PER_WORKER) or [(header_end, header_end)]
+
+    with ProcessPoolExecutor(min(workers, len(ranges)), mp_context=get_context("spawn")) as ex:
+        for enc in ENCODINGS:
+            sep = sniff_sep(head, enc)
+            if sep is None:
+                continue
+            starts, ends = zip(*ranges)
+            n = len(ranges)
+            parts = list(ex.map(_map_range, [path] * n, [header_end] * n, starts, ends, [enc] * n, [sep] * n))
+            if all(p is not None for p in parts):
+                return sum_by_donor(pd.concat(parts, ignore_index=True))
+    raise ValueError("CSV 인코딩/구분자 해석 실패")
+
+
+def aggregate_upload_parallel(data, workers: int | None = None) -> pd.DataFrame:
+    """업로드 바이트(또는 버퍼) → 임시 파일에 한 번 써서 mmap 가능하게 한 뒤 aggregate_csv_parallel"""
+    fd, tmp = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return aggregate_csv_parallel(tmp, workers)
+    finally:
+        os.unlink(tmp)
+
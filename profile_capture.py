@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+profile_capture.py
+- 필요할 때만 켜는 결정적 프로파일러(cProfile) 래퍼
+    하트 합계 탭: '프로파일러' 토글이 켜진 실행만 측정 → 상위 N 함수 표 + 원본 .prof 다운로드
+    panda_dm_sender: --profile-out 경로를 주면 전송 배치를 측정해 .prof 저장 + 상위 N 출력
+- 꺼져 있으면 아무것도 하지 않음 (cProfile/pstats 도 켤 때만 import)
+- .prof 는 `python -m pstats 파일` 또는 snakeviz 로 열 수 있음
+"""
+
+import os, heapq, uuid, tempfile
+from pathlib import Path
+
+
+class ProfileCapture:
+    """with 블록(또는 start/stop 사이)을 여러 번 감싸도 한 프로파일에 누적"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.prof = None
+        self.capture_id = ""    # 측정 1회 식별자 (다운로드 산출물 memo 키)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        if self.prof is None:
+            import cProfile
+            self.prof = cProfile.Profile()
+            self.capture_id = uuid.uuid4().hex
+        self.prof.enable()
+
+    def stop(self) -> None:
+        if self.prof is not None:
+            self.prof.disable()
+
+    @property
+    def captured(self) -> bool:
+        return self.prof is not None
+
+    def stats(self):
+        import pstats
+        return pstats.Stats(self.prof)
+
+    def top(self, n: int = 30) -> list:
+        return top_functions(self.stats(), n)
+
+    def dump(self, path) -> None:
+        self.prof.dump_stats(str(path))
+
+    def raw_bytes(self) -> bytes:
+        """원본 .prof (marshal) 바이트 — 다운로드용"""
+        fd, tmp = tempfile.mkstemp(suffix=".prof")
+        os.close(fd)
+        try:
+            self.dump(tmp)
+            return Path(tmp).read_bytes()
+        finally:
+            os.unlink(tmp)
+
+
+def load_stats(path):
+    """저장된 .prof → pstats.Stats"""
+    import pstats
+    return pstats.Stats(str(path))
+
+
+def top_functions(stats, n: int = 30) -> list:
+    """누적시간 상위 n개 함수 → [{함수, 위치, 호출수, 자체(s), 누적(s), 호출당(ms)}]"""
+    rows = []
+    for (fname, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        loc = "~" if fname == "~" else f"{Path(fname).name}:{line}"
+        rows.append({
+            "함수": func, "위치": loc,
+            "호출수": str(nc) if nc == cc else f"{nc}/{cc}",   # 재귀면 전체/원시 호출
+            "자체(s)": round(tt, 4), "누적(s)": round(ct, 4),
+            "호출당(ms)": round(ct / nc * 1000, 3) if nc else 0.0,
+        })
+    return heapq.nlargest(n, rows, key=lambda r: r["누적(s)"])
+
+
+def format_top(rows: list) -> str:
+    """CLI 출력용 표"""
+    lines = [f"{'누적(s)':>9} {'자체(s)':>9} {'호출수':>10}  함수 (위치)"]
+    for r in rows:
+        lines.append(f"{r['누적(s)']:>9.3f} {r['자체(s)']:>9.3f} {str(r['호출수']):>10}  {r['함수']} ({r['위치']})")
+    return "\n".join(lines)
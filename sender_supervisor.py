@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+sender_supervisor.py
+- panda_dm_sender 자식 프로세스 관리자 (스트림릿 서버당 1개, dm_ui에서 st.cache_resource로 공유)
+- 자식 stdout을 파이프로 받아 로그 파일에 그대로 쓰고, '@@evt {json}' 줄은 진행/종료 이벤트로 해석
+- 종료 감지는 전용 스레드의 wait() 로 즉시 (파일 폴링/세션별 PID 불필요)
+- 강제 종료는 프로세스 그룹(크롬/chromedriver 포함) 전체 대상
+"""
+
+import os, json, time, signal, threading, subprocess
+from collections import deque
+from pathlib import Path
+
+EVENT_PREFIX = "@@evt "
+
+
+def emit_event(kind: str, **data) -> None:
+    """(sender 쪽) 관리자에게 이벤트 한 줄 전송. SENDER_EVENTS=1 일 때만 출력."""
+    if os.environ.get("SENDER_EVENTS") != "1":
+        return
+    rec = {"type": kind, "ts": round(time.time(), 3), **data}
+    print(EVENT_PREFIX + json.dumps(rec, ensure_ascii=False), flush=True)
+
+
+class SenderSupervisor:
+    """전송 프로세스 하나를 소유하고 상태(running/exit_code/최근 이벤트)를 모든 세션에 공개"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.proc = None
+        self.started = None
+        self.ended = None
+        self.exit_code = None
+        self.last_progress = {}
+        self.events = deque(maxlen=200)
+
+    # ----- 상태 -----
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "running": self.proc is not None and self.exit_code is None,
+                "pid": self.proc.pid if self.proc else None,
+                "exit_code": self.exit_code,
+                "started": self.started,
+                "ended": self.ended,
+                "progress": dict(self.last_progress),
+                "last_event": self.events[-1] if self.events else None,
+            }
+
+    # ----- 실행 -----
+    def start(self, cmd: list, log_out: Path, log_err: Path) -> bool:
+        """이미 실행 중이면 False. 로그 파일은 새로 만든다."""
+        with self.lock:
+            if self.proc is not None and self.exit_code is None:
+                return False
+            env = dict(os.environ, PYTHONUNBUFFERED="1", SENDER_EVENTS="1")
+            kw = {}
+            if os.name == "nt":
+                kw["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+            else:
+                kw["start_new_session"] = True   # 새 프로세스 그룹 → 크롬까지 한 번에 종료
+            err_f = open(log_err, "w", encoding="utf-8", buffering=1)
+            self.proc = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=err_f, stdin=subprocess.DEVNULL,
+                text=True, encoding="utf-8", errors="replace", bufsize=1, env=env, **kw,
+            )
+            err_f.close()   # 자식이 핸들을 물려받았으므로 부모 쪽은 닫아도 됨
+            self.started, self.ended, self.exit_code = time.time(), None, None
+            self.last_progress = {}
+            self.events.clear()
+            proc = self.proc
+        threading.Thread(target=self._pump, args=(proc, Path(log_out)), daemon=True).start()
+        threading.Thread(target=self._reap, args=(proc,), daemon=True).start()
+        return True
+
+    def _pump(self, proc, log_out: Path) -> None:
+        """자식 stdout → 로그 파일 + 이벤트 파싱 (크롬 등 손자 프로세스가 파이프를 물고 있을 수 있어 종료 판정은 _reap)"""
+        with open(log_out, "w", encoding="utf-8", buffering=1) as out_f:
+            for line in proc.stdout:
+                if line.startswith(EVENT_PREFIX):
+                    try:
+                        ev = json.loads(line[len(EVENT_PREFIX):])
+                    except Exception:
+                        continue
+                    with self.lock:
+                        self.events.append(ev)
+                        if ev.get("type") in ("progress", "start", "done"):
+                            self.last_progress.update({k: v for k, v in ev.items() if k not in ("type", "ts")})
+                    continue
+                out_f.write(line)
+
+    def _reap(self, proc) -> None:
+        """자식 종료 즉시 종료코드 기록"""
+        code = proc.wait()
+        with self.lock:
+            if proc is self.proc:
+                self.exit_code = code
+                self.ended = time.time()
+                self.events.append({"type": "exit", "ts": round(self.ended, 3), "code": code})
+
+    # ----- 종료 -----
+    def kill(self, grace: float = 3.0) -> bool:
+        """프로세스 그룹 전체 종료 (SIGTERM → grace초 후 SIGKILL). 실행 중이 아니면 False."""
+        with self.lock:
+            proc = self.proc if (self.proc is not None and self.exit_code is None) else None
+        if proc is None:
+            return False
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/PID", str(proc.pid), "/F", "/T"], capture_output=True)
+        else:
+            try:
+                os.killpg(proc.pid, signal.SIGTERM)
+                proc.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            # 부모가 먼저 죽어도 그룹에 남은 크롬/드라이버 정리
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        try:
+            proc.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            pass
+        return True